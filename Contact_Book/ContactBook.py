@@ -1,12 +1,283 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
-import re
-import json  
+from tkinter import filedialog, messagebox, ttk
+import argparse
 import os
+import threading
+import time
 from tkinter import font
+from contact_storage import SearchCancelled, open_backend
+from contact_store import ContactError, ContactStore
+import contact_dedupe
+import contact_export
+import contact_import
+from contact_perf import PerfMonitor
+
+class VirtualContactList:
+    """Windowed Treeview that only materializes the rows in view"""
+
+    OVERSCAN = 3
+
+    def __init__(self, tree, scrollbar, on_select=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.on_select = on_select
+        self.row_height = int(ttk.Style().lookup(tree.cget('style'), 'rowheight') or 20)
+
+        self.total = 0
+        self.fetch = None
+        self.locate = None
+        self.top = 0          # index of the first row in the viewport
+        self.page_size = 1    # rows that fit in the viewport
+        self.rows = []        # contacts currently materialized, in order
+        self.shown = {}       # contact id -> (values, tag) last written to the tree
+        self.selected_index = None
+        self.selected_id = None
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3) or "break")
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3) or "break")
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.page_size))
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.page_size))
+
+    def set_rows(self, total, fetch, locate=None):
+        """Show a new result set
+
+        fetch(offset, limit) returns contacts, and locate(contact_id), if
+        given, the index of a contact in the result set or None.
+        """
+        self.total = total
+        self.fetch = fetch
+        self.locate = locate
+        self.top = 0
+        self.selected_index = None
+        self.selected_id = None
+        self.render()
+
+    def refresh(self, total):
+        """Show the same result set again after edits, keeping scroll and selection
+
+        render only touches rows whose contact, values or stripe changed, so
+        an add, update or delete costs a handful of Tk calls however long
+        the list is.
+        """
+        self.total = total
+        self.top = max(0, min(self.top, total - self.page_size))
+        self.render()
+        if self.selected_id is not None:
+            position = next((i for i, contact in enumerate(self.rows)
+                             if contact['id'] == self.selected_id), None)
+            if position is not None:
+                self.selected_index = self.top + position
+            else:
+                # Outside the window, so the edit may have moved it anywhere
+                index = self.locate(self.selected_id) if self.locate else None
+                if index is None:
+                    self.clear_selection()
+                else:
+                    self.selected_index = index
+
+    def clear_selection(self):
+        """Forget the selected contact, e.g. once it has been deleted"""
+        self.selected_index = None
+        self.selected_id = None
+        self.sync_selection()
+
+    def render(self):
+        """Materialize the viewport plus overscan, keyed by contact id"""
+        if self.total:
+            rows = self.fetch(self.top, self.page_size + self.OVERSCAN)
+        else:
+            rows = []
+
+        # Drop rows that left the window; rows still in it are reused as is
+        wanted = {contact['id'] for contact in rows}
+        stale = [iid for iid in self.shown if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.shown[iid]
+        current = [contact['id'] for contact in self.rows if contact['id'] in self.shown]
+
+        for position, contact in enumerate(rows):
+            iid = contact['id']
+            tag = 'evenrow' if (self.top + position) % 2 == 0 else 'oddrow'
+            values = (contact['name'], contact['phone'],
+                      contact['email'], contact['address'])
+            if iid not in self.shown:
+                self.tree.insert("", position, iid=iid, values=values, tags=(tag,))
+                current.insert(position, iid)
+            else:
+                if current[position] != iid:
+                    self.tree.move(iid, "", position)
+                    current.remove(iid)
+                    current.insert(position, iid)
+                if self.shown[iid] != (values, tag):
+                    self.tree.item(iid, values=values, tags=(tag,))
+            self.shown[iid] = (values, tag)
+        self.rows = rows
+
+        self.tree.yview_moveto(0)
+        self.sync_selection()
+        self.update_scrollbar()
+
+    def sync_selection(self):
+        """Keep the Treeview selection on the selected contact while it is shown"""
+        if self.selected_id in self.shown:
+            if self.tree.selection() != (self.selected_id,):
+                self.tree.selection_set(self.selected_id)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def update_scrollbar(self):
+        """Size the scrollbar thumb against the full result set"""
+        if self.total <= self.page_size:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / self.total,
+                               min(1, (self.top + self.page_size) / self.total))
+
+    def scroll_to(self, top):
+        """Move the viewport so that row top is first"""
+        top = max(0, min(top, self.total - self.page_size))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def yview(self, *args):
+        """Scrollbar command handler"""
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.page_size
+            self.scroll_to(self.top + amount)
+
+    def on_mousewheel(self, event):
+        """Scroll by wheel notches"""
+        # Windows reports multiples of 120 per notch, macOS reports small steps
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.top - step * 3)
+        return "break"
+
+    def on_resize(self, event):
+        """Recompute how many rows fit when the widget is resized"""
+        # One row's worth of height is taken by the headings
+        page_size = max(1, event.height // self.row_height - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.top = max(0, min(self.top, self.total - self.page_size))
+            self.render()
+
+    def on_tree_select(self, event):
+        """Record which contact the user picked"""
+        selection = self.tree.selection()
+        if not selection or selection[0] == self.selected_id:
+            return
+        position = next(i for i, contact in enumerate(self.rows)
+                        if contact['id'] == selection[0])
+        self.select_index(self.top + position)
+
+    def select_index(self, index):
+        """Select the row at index, which must be inside the viewport"""
+        self.selected_index = index
+        self.selected_id = self.rows[index - self.top]['id']
+        self.sync_selection()
+        if self.on_select:
+            self.on_select()
+
+    def move_selection(self, delta):
+        """Keyboard navigation that scrolls the window instead of the items"""
+        if not self.total:
+            return "break"
+        if self.selected_index is None:
+            index = self.top
+        else:
+            index = max(0, min(self.total - 1, self.selected_index + delta))
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.page_size:
+            self.scroll_to(index - self.page_size + 1)
+        self.select_index(index)
+        return "break"
+
+class SearchWorker:
+    """Debounced contact search on a background thread
+
+    Only the newest search term is ever run. A keystroke makes any search
+    in flight stale, which aborts it, and results reach the UI through
+    root.after only if nothing newer was requested meanwhile.
+    """
+
+    DELAY = 150  # ms of typing quiet before a search starts
+
+    def __init__(self, root, store, on_result):
+        self.root = root
+        self.store = store
+        self.on_result = on_result
+        self.generation = 0
+        self.pending = None  # (generation, search term, fuzzy, sort) not yet picked up
+        self.after_id = None
+        self.condition = threading.Condition()
+
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+
+    def request(self, search_term, fuzzy=False, sort=(), delay=None):
+        """Search for search_term once typing pauses for delay ms"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        with self.condition:
+            self.generation += 1
+            generation = self.generation
+        self.after_id = self.root.after(self.DELAY if delay is None else delay,
+                                        self.submit, generation, search_term, fuzzy, sort)
+
+    def submit(self, generation, search_term, fuzzy, sort):
+        """Hand the debounced term to the worker thread"""
+        self.after_id = None
+        with self.condition:
+            self.pending = (generation, search_term, fuzzy, sort)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, search_term, fuzzy, sort = self.pending
+                self.pending = None
+
+            def stale():
+                return generation != self.generation
+
+            try:
+                # Sorting happens here too, so the UI thread only slices pages
+                total = self.store.count(search_term, cancelled=stale, fuzzy=fuzzy, sort=sort)
+            except SearchCancelled:
+                continue
+            except Exception as e:
+                self.root.after(0, messagebox.showerror, "Error", f"Search failed: {str(e)}")
+                continue
+            if not stale():
+                self.root.after(0, self.deliver, generation, search_term, fuzzy, sort, total)
+
+    def deliver(self, generation, search_term, fuzzy, sort, total):
+        """Apply a result on the Tk thread unless a newer search was requested"""
+        if generation == self.generation:
+            self.on_result(search_term, fuzzy, sort, total)
 
 class ModernContactManager:
-    def __init__(self, root):
+    SYNC_INTERVAL = 1000  # ms between checks for other windows' edits to the file
+    HEADINGS = {"Name": "👤 Name", "Phone": "📞 Phone",
+                "Email": "📧 Email", "Address": "🏠 Address"}
+    
+    def __init__(self, root, contacts_file="contacts.json", perf=False):
         self.root = root
         self.root.title("Contact Manager Pro")
         self.root.geometry("1200x800")
@@ -34,17 +305,54 @@ class ModernContactManager:
             'small': ('Segoe UI', 9)
         }
         
-        # File to store contacts
-        self.contacts_file = "contacts.json"
-        self.contacts = self.load_contacts()
+        # File to store contacts; a .db file selects the SQLite backend
+        self.contacts_file = contacts_file
+        self.store = ContactStore(open_backend(self.contacts_file))
+        
+        # Contacts load in the background once the window is up
+        self.loading = False
+        self.load_thread = None
+        self.load_cancelled = threading.Event()
+        
+        # Background bulk import, if one is running
+        self.import_thread = None
+        self.import_cancelled = threading.Event()
+        
+        # Background duplicate scan, if one is running
+        self.dedupe_thread = None
         
         # Search variable
         self.search_var = tk.StringVar()
         self.search_var.trace('w', self.search_contacts)
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        self.fuzzy_var.trace('w', self.search_contacts)
+        # (field, descending) pairs from the column headings, first one primary
+        self.sort = ()
+        # (search term, fuzzy, sort) the list is showing; results for it again are edits
+        self.shown_search = None
+        
+        # Opt-in timings of the hot paths, shown next to the contact count
+        self.perf = PerfMonitor(enabled=perf)
         
         self.setup_styles()
         self.setup_ui()
-        self.refresh_contact_list()
+        
+        if self.perf.enabled:
+            self.perf.instrument(self.store, 'load', rows=lambda _: len(self.store))
+            self.perf.instrument(self.store, 'count', 'search', rows=lambda total: total)
+            self.perf.instrument(self.store, 'page', rows=len)
+            self.perf.instrument(self.store, 'validate')
+            self.perf.instrument(self.store, 'sync')
+            self.perf.instrument(self.contact_list, 'render',
+                                 rows=lambda _: len(self.contact_list.rows))
+            self.perf.instrument(self, 'save_contacts', 'save')
+            self.root.bind("<F12>", self.dump_trace)
+            self.root.bind("<Shift-F12>", self.toggle_profile)
+            self.root.after(self.SYNC_INTERVAL, self.show_perf)
+        
+        # Searches run off the Tk thread
+        self.search_worker = SearchWorker(self.root, self.store, self.show_search_results)
+        self.load_contacts()
     
     def setup_styles(self):
         """Configure custom styles"""
@@ -153,11 +461,22 @@ class ModernContactManager:
         stats_frame.pack(side='right', padx=20, pady=20)
         
         self.stats_label = tk.Label(stats_frame,
-                                   text=f"Total Contacts: {len(self.contacts)}",
+                                   text=f"Total Contacts: {len(self.store)}",
                                    font=self.fonts['body'],
                                    bg=self.colors['primary'],
                                    fg='white')
-        self.stats_label.pack()
+        self.stats_label.pack(side='right')
+        
+        if self.perf.enabled:
+            # Rolling p50/p95 per timed operation and the rows it last handled
+            self.perf_label = tk.Label(stats_frame,
+                                      text=self.perf.summary_text(),
+                                      font=self.fonts['small'],
+                                      bg=self.colors['primary'],
+                                      fg=self.colors['light'],
+                                      justify='right',
+                                      wraplength=520)
+            self.perf_label.pack(side='right', padx=(0, 20))
     
     def create_form_panel(self, parent):
         """Create the form panel"""
@@ -301,6 +620,42 @@ class ModernContactManager:
                              cursor='hand2',
                              pady=10)
         clear_btn.pack(fill='x', pady=5)
+        
+        # Import button
+        import_btn = tk.Button(button_frame,
+                              text="📥 Import Contacts",
+                              command=self.import_contacts,
+                              bg=self.colors['primary'],
+                              fg='white',
+                              font=self.fonts['body'],
+                              relief='flat',
+                              cursor='hand2',
+                              pady=10)
+        import_btn.pack(fill='x', pady=5)
+        
+        # Export button
+        export_btn = tk.Button(button_frame,
+                              text="📤 Export Contacts",
+                              command=self.export_contacts,
+                              bg=self.colors['primary'],
+                              fg='white',
+                              font=self.fonts['body'],
+                              relief='flat',
+                              cursor='hand2',
+                              pady=10)
+        export_btn.pack(fill='x', pady=5)
+        
+        # Find duplicates button
+        dedupe_btn = tk.Button(button_frame,
+                              text="🧬 Find Duplicates",
+                              command=self.find_duplicates,
+                              bg=self.colors['secondary'],
+                              fg='white',
+                              font=self.fonts['body'],
+                              relief='flat',
+                              cursor='hand2',
+                              pady=10)
+        dedupe_btn.pack(fill='x', pady=5)
     
     def create_list_panel(self, parent):
         """Create the contact list panel"""
@@ -327,6 +682,17 @@ class ModernContactManager:
                                bg='white')
         search_entry.pack(side='left', fill='x', expand=True, padx=(10, 0))
         
+        # Fuzzy mode tolerates typos and sound-alikes in names, best match first
+        tk.Checkbutton(search_frame,
+                      text="Fuzzy",
+                      variable=self.fuzzy_var,
+                      font=self.fonts['body'],
+                      bg=self.colors['primary'],
+                      fg='white',
+                      selectcolor=self.colors['primary'],
+                      activebackground=self.colors['primary'],
+                      activeforeground='white').pack(side='left', padx=(10, 0))
+        
         # List content
         list_content = tk.Frame(parent, bg='white')
         list_content.pack(fill='both', expand=True, padx=20, pady=20)
@@ -341,30 +707,32 @@ class ModernContactManager:
                                 show="headings",
                                 style='Modern.Treeview')
         
-        # Configure columns
-        self.tree.heading("Name", text="👤 Name")
-        self.tree.heading("Phone", text="📞 Phone")
-        self.tree.heading("Email", text="📧 Email")
-        self.tree.heading("Address", text="🏠 Address")
+        # Configure columns; clicking a heading sorts by it
+        for column in self.HEADINGS:
+            self.tree.heading(column, text=self.HEADINGS[column],
+                              command=lambda field=column.lower(): self.sort_by(field))
         
         self.tree.column("Name", width=200)
         self.tree.column("Phone", width=150)
         self.tree.column("Email", width=200)
         self.tree.column("Address", width=250)
         
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        # Scrollbars; the vertical one drives the virtual window, not the tree
+        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
         h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
         
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
         
         # Pack treeview and scrollbars
         self.tree.pack(side='left', fill='both', expand=True)
         v_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
         
+        # Only the rows in view are materialized
+        self.contact_list = VirtualContactList(self.tree, v_scrollbar,
+                                               on_select=self.on_contact_select)
+        
         # Bind events
-        self.tree.bind("<<TreeviewSelect>>", self.on_contact_select)
         self.tree.bind("<Double-1>", self.on_contact_double_click)
         
         # Configure alternating row colors
@@ -372,122 +740,42 @@ class ModernContactManager:
         self.tree.tag_configure('evenrow', background='white')
     
     def search_contacts(self, *args):
-        """Search contacts based on search term"""
-        search_term = self.search_var.get().lower()
-        
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Filter and add contacts
-        for i, contact in enumerate(self.contacts):
-            if (search_term in contact['name'].lower() or
-                search_term in contact['phone'].lower() or
-                search_term in contact['email'].lower() or
-                search_term in contact['address'].lower()):
-                
-                tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-                self.tree.insert("", tk.END,
-                                values=(contact['name'], contact['phone'], 
-                                       contact['email'], contact['address']),
-                                tags=(tag,))
-    
-    def validate_phone(self, phone):
-        """Validate phone number format with international support"""
-        if not phone:
-            return False, "Phone number is required"
-        
-        # Clean the phone number for validation
-        phone = phone.strip()
-        
-        # Remove common separators for digit counting
-        digits_only = re.sub(r'[^\d]', '', phone)
-        
-        # Check if it's a valid international format
-        # Pattern for international phone numbers:
-        # - Must start with + (optional)
-        # - Country code (1-4 digits)
-        # - Area/city code and number (6-14 digits)
-        # - Total digits should be 7-15
-        
-        # Valid characters: digits, spaces, hyphens, parentheses, plus sign, dots
-        if not re.match(r'^[\d\s\-\(\)\+\.]+$', phone):
-            return False, "Phone number can only contain digits, spaces, hyphens, parentheses, plus sign, and dots"
-        
-        # Check digit count
-        if len(digits_only) < 7:
-            return False, "Phone number must have at least 7 digits"
-        elif len(digits_only) > 15:
-            return False, "Phone number cannot have more than 15 digits"
-        
-        # Check for valid international format patterns
-        international_patterns = [
-            r'^\+\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{0,4}$',  # +1-123-456-7890
-            r'^\+\d{1,4}\s?\(\d{1,4}\)\s?\d{1,4}[\s\-]?\d{1,4}$',  # +1 (123) 456-7890
-            r'^\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{0,4}$',  # 123-456-7890
-            r'^\(\d{1,4}\)\s?\d{1,4}[\s\-]?\d{1,4}$',  # (123) 456-7890
-            r'^\d{10,15}$',  # 1234567890
-        ]
-        
-        is_valid_format = any(re.match(pattern, phone) for pattern in international_patterns)
-        
-        if not is_valid_format:
-            return False, "Invalid phone number format."
-        
-        return True, "Valid phone number"
-    
-    def validate_email(self, email):
-        """Validate email format with comprehensive checks"""
-        if not email:
-            return True, "Email is optional"
-        
-        email = email.strip()
-        
-        # Check length
-        if len(email) > 254:
-            return False, "Email address is too long (max 254 characters)"
-        
-        # Check for basic format
-        if email.count('@') != 1:
-            return False, "Email must contain exactly one @ symbol"
-        
-        local_part, domain_part = email.split('@')
-        
-        # Validate local part (before @)
-        if not local_part or len(local_part) > 64:
-            return False, "Email local part (before @) must be 1-64 characters"
-        
-        # Validate domain part (after @)
-        if not domain_part or len(domain_part) > 253:
-            return False, "Email domain part (after @) must be 1-253 characters"
-        
-        # Check for valid characters in local part
-        if not re.match(r'^[a-zA-Z0-9._%+-]+$', local_part):
-            return False, "Email local part contains invalid characters"
-        
-        # Check for valid domain format
-        if not re.match(r'^[a-zA-Z0-9.-]+$', domain_part):
-            return False, "Email domain contains invalid characters"
-        
-        # Check for valid domain structure
-        if not re.match(r'^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', domain_part):
-            return False, "Email domain must have a valid top-level domain (e.g., .com, .org)"
-        
-        # Check for consecutive dots
-        if '..' in email:
-            return False, "Email cannot contain consecutive dots"
-        
-        # Check for dots at the beginning or end of local part
-        if local_part.startswith('.') or local_part.endswith('.'):
-            return False, "Email local part cannot start or end with a dot"
-        
-        # Additional comprehensive check
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        
-        if not re.match(email_pattern, email):
-            return False, "Invalid email format. Use format: example@domain.com"
-        
-        return True, "Valid email"
+        """Search contacts based on search term once typing pauses"""
+        self.search_worker.request(self.search_var.get(), self.fuzzy_var.get(), self.sort)
+    
+    def show_search_results(self, search_term, fuzzy, sort, total):
+        """Show the matches counted by the search worker"""
+        if (search_term, fuzzy, sort) == self.shown_search:
+            # Same search after an edit: keep the user's place, redraw what changed
+            selected_id = self.contact_list.selected_id
+            if selected_id is not None and self.store.get(selected_id) is None:
+                self.contact_list.clear_selection()
+            self.contact_list.refresh(total)
+            return
+        self.shown_search = (search_term, fuzzy, sort)
+        self.contact_list.set_rows(
+            total,
+            lambda offset, limit: self.store.page(search_term, offset, limit, fuzzy, sort),
+            lambda contact_id: self.store.position(search_term, contact_id, fuzzy, sort))
+    
+    def sort_by(self, field):
+        """Heading click: sort ascending, then descending, then back to list order
+
+        Columns sorted on earlier stay on as tie-breakers.
+        """
+        others = tuple(spec for spec in self.sort if spec[0] != field)
+        if self.sort[:1] == ((field, False),):
+            self.sort = ((field, True),) + others
+        elif self.sort[:1] == ((field, True),):
+            self.sort = ()
+        else:
+            self.sort = ((field, False),) + others
+        
+        for column, text in self.HEADINGS.items():
+            if self.sort and self.sort[0][0] == column.lower():
+                text += " ▼" if self.sort[0][1] else " ▲"
+            self.tree.heading(column, text=text)
+        self.refresh_contact_list()
     
     def show_success_message(self, title, message):
         """Show success message with custom styling"""
@@ -499,49 +787,16 @@ class ModernContactManager:
     
     def add_contact(self):
         """Add a new contact"""
+        if not self.check_loaded():
+            return
         name = self.name_entry.get().strip()
         phone = self.phone_entry.get().strip()
         email = self.email_entry.get().strip()
         address = self.address_text.get("1.0", tk.END).strip()
         
-        if not name:
-            self.show_error_message("Validation Error", "Name is required")
-            return
-        
-        phone_valid, phone_msg = self.validate_phone(phone)
-        if not phone_valid:
-            self.show_error_message("Phone Validation Error", phone_msg)
-            return
-        
-        email_valid, email_msg = self.validate_email(email)
-        if not email_valid:
-            self.show_error_message("Email Validation Error", email_msg)
-            return
-        
-        # Check for duplicate names
-        if any(contact['name'].lower() == name.lower() for contact in self.contacts):
-            self.show_error_message("Duplicate Contact", "Contact with this name already exists")
-            return
-        
-        # Check for duplicate phone numbers
-        if any(contact['phone'] == phone for contact in self.contacts):
-            self.show_error_message("Duplicate Contact", "Contact with this phone number already exists")
-            return
-        
-        # Check for duplicate email addresses (if provided)
-        if email and any(contact['email'].lower() == email.lower() for contact in self.contacts):
-            self.show_error_message("Duplicate Contact", "Contact with this email address already exists")
+        # The store validates and checks for duplicates before saving
+        if not self.save_contacts(self.store.add, name, phone, email, address):
             return
-        
-        contact = {
-            'name': name,
-            'phone': phone,
-            'email': email,
-            'address': address
-        }
-        
-        self.contacts.append(contact)
-        self.save_contacts()
         self.refresh_contact_list()
         self.clear_fields()
         self.update_stats()
@@ -550,69 +805,20 @@ class ModernContactManager:
     
     def update_contact(self):
         """Update selected contact"""
-        selected_item = self.tree.selection()
-        if not selected_item:
+        if not self.check_loaded():
+            return
+        contact_id = self.contact_list.selected_id
+        if contact_id is None or self.store.get(contact_id) is None:
             self.show_error_message("Selection Error", "Please select a contact to update")
             return
         
-        contact_index = self.tree.index(selected_item[0])
-        
         name = self.name_entry.get().strip()
         phone = self.phone_entry.get().strip()
         email = self.email_entry.get().strip()
         address = self.address_text.get("1.0", tk.END).strip()
         
-        if not name:
-            self.show_error_message("Validation Error", "Name is required")
+        if not self.save_contacts(self.store.update, contact_id, name, phone, email, address):
             return
-        
-        phone_valid, phone_msg = self.validate_phone(phone)
-        if not phone_valid:
-            self.show_error_message("Phone Validation Error", phone_msg)
-            return
-        
-        email_valid, email_msg = self.validate_email(email)
-        if not email_valid:
-            self.show_error_message("Email Validation Error", email_msg)
-            return
-        
-        # Find the actual contact in the filtered list
-        visible_contacts = []
-        search_term = self.search_var.get().lower()
-        
-        for contact in self.contacts:
-            if (search_term in contact['name'].lower() or
-                search_term in contact['phone'].lower() or
-                search_term in contact['email'].lower() or
-                search_term in contact['address'].lower()):
-                visible_contacts.append(contact)
-        
-        if contact_index < len(visible_contacts):
-            # Find the original index
-            original_contact = visible_contacts[contact_index]
-            original_index = self.contacts.index(original_contact)
-            
-            # Check for duplicates (excluding the current contact)
-            for i, contact in enumerate(self.contacts):
-                if i != original_index:
-                    if contact['name'].lower() == name.lower():
-                        self.show_error_message("Duplicate Contact", "Another contact with this name already exists")
-                        return
-                    if contact['phone'] == phone:
-                        self.show_error_message("Duplicate Contact", "Another contact with this phone number already exists")
-                        return
-                    if email and contact['email'].lower() == email.lower():
-                        self.show_error_message("Duplicate Contact", "Another contact with this email address already exists")
-                        return
-            
-            self.contacts[original_index] = {
-                'name': name,
-                'phone': phone,
-                'email': email,
-                'address': address
-            }
-        
-        self.save_contacts()
         self.refresh_contact_list()
         self.clear_fields()
         
@@ -620,37 +826,153 @@ class ModernContactManager:
     
     def delete_contact(self):
         """Delete selected contact"""
-        selected_item = self.tree.selection()
-        if not selected_item:
+        if not self.check_loaded():
+            return
+        contact_id = self.contact_list.selected_id
+        if contact_id is None or self.store.get(contact_id) is None:
             self.show_error_message("Selection Error", "Please select a contact to delete")
             return
         
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this contact?"):
-            contact_index = self.tree.index(selected_item[0])
-            
-            # Find the actual contact in the filtered list
-            visible_contacts = []
-            search_term = self.search_var.get().lower()
-            
-            for contact in self.contacts:
-                if (search_term in contact['name'].lower() or
-                    search_term in contact['phone'].lower() or
-                    search_term in contact['email'].lower() or
-                    search_term in contact['address'].lower()):
-                    visible_contacts.append(contact)
-            
-            if contact_index < len(visible_contacts):
-                # Find the original index and remove
-                original_contact = visible_contacts[contact_index]
-                self.contacts.remove(original_contact)
-            
-            self.save_contacts()
+            if not self.save_contacts(self.store.delete, contact_id):
+                return
             self.refresh_contact_list()
             self.clear_fields()
             self.update_stats()
             
             self.show_success_message("Success", "Contact deleted successfully! 🗑️")
     
+    def import_contacts(self):
+        """Bulk import contacts from a CSV or vCard file in the background"""
+        if not self.check_loaded():
+            return
+        if self.import_thread is not None and self.import_thread.is_alive():
+            self.show_error_message("Import Error", "An import is already running")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="Import Contacts",
+            filetypes=[("Contact files", "*.csv *.vcf *.vcard"),
+                       ("CSV files", "*.csv"),
+                       ("vCard files", "*.vcf *.vcard"),
+                       ("All files", "*.*")])
+        if not path:
+            return
+        
+        def progress(report):
+            self.root.after(0, self.show_import_progress, report)
+        
+        def run():
+            try:
+                report = contact_import.import_contacts(
+                    self.store, path,
+                    progress=progress,
+                    cancelled=self.import_cancelled.is_set)
+            except Exception as e:
+                self.root.after(0, self.finish_import, None, str(e))
+                return
+            self.root.after(0, self.finish_import, report, None)
+        
+        self.import_cancelled.clear()
+        self.import_thread = threading.Thread(target=run, daemon=True)
+        self.import_thread.start()
+    
+    def show_import_progress(self, report):
+        """Show import progress in the header"""
+        self.stats_label.config(text=f"Importing… {report.rows} rows read, {report.imported} added")
+    
+    def finish_import(self, report, error):
+        """Refresh the list and report the outcome of an import"""
+        if self.import_cancelled.is_set():
+            return  # the window is closing
+        self.refresh_contact_list()
+        self.update_stats()
+        if error:
+            self.show_error_message("Import Error", f"Failed to import contacts: {error}")
+            return
+        
+        message = report.summary()
+        if report.errors:
+            message += "\n\n" + "\n".join(report.errors[:10])
+        self.show_success_message("Import Complete", message)
+    
+    def export_contacts(self):
+        """Export the contacts matching the current search in the background"""
+        if not self.check_loaded():
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Contacts",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"),
+                       ("JSON Lines", "*.jsonl"),
+                       ("vCard files", "*.vcf")])
+        if not path:
+            return
+        
+        search_term = self.search_var.get()
+        
+        def run():
+            try:
+                written = self.store.export(path, search_term=search_term)
+            except Exception as e:
+                self.root.after(0, self.show_error_message, "Export Error",
+                                f"Failed to export contacts: {str(e)}")
+                return
+            self.root.after(0, self.show_success_message, "Export Complete",
+                            f"Exported {written} contacts to {path}")
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def find_duplicates(self):
+        """Look for duplicate contacts in the background, then offer to merge them"""
+        if not self.check_loaded():
+            return
+        if self.dedupe_thread is not None and self.dedupe_thread.is_alive():
+            self.show_error_message("Find Duplicates", "Already looking for duplicates")
+            return
+        self.stats_label.config(text="Looking for duplicates…")
+        
+        def run():
+            try:
+                groups, merges = contact_dedupe.plan_merges(self.store)
+            except Exception as e:
+                self.root.after(0, self.finish_dedupe, None, None, str(e))
+                return
+            self.root.after(0, self.finish_dedupe, groups, merges, None)
+        
+        self.dedupe_thread = threading.Thread(target=run, daemon=True)
+        self.dedupe_thread.start()
+    
+    def finish_dedupe(self, groups, merges, error):
+        """Ask before merging the duplicate groups a scan found"""
+        self.update_stats()
+        if error:
+            self.show_error_message("Find Duplicates", f"Failed to look for duplicates: {error}")
+            return
+        if not groups:
+            self.show_success_message("Find Duplicates", "No duplicate contacts found")
+            return
+        
+        removed = sum(len(ids) for _, ids, _ in merges)
+        examples = "\n".join(" = ".join(contact['name'] for contact in group)
+                             for group in groups[:10])
+        if not messagebox.askyesno(
+                "Merge Duplicates",
+                f"Found {len(groups)} groups of duplicates:\n\n{examples}\n\n"
+                f"Merge them, removing {removed} contacts?"):
+            return
+        merged = []
+        if self.save_contacts(lambda: merged.append(self.store.merge(merges))):
+            self.contact_list.clear_selection()
+            self.clear_fields()
+            self.refresh_contact_list()
+            self.update_stats()
+            message = f"Merged {merged[0]} groups of duplicates"
+            if merged[0] < len(merges):
+                message += (f"\n\n{len(merges) - merged[0]} groups changed since the scan "
+                            "and were left alone")
+            self.show_success_message("Merge Complete", message)
+    
     def clear_fields(self):
         """Clear all input fields"""
         self.name_entry.delete(0, tk.END)
@@ -658,31 +980,16 @@ class ModernContactManager:
         self.email_entry.delete(0, tk.END)
         self.address_text.delete("1.0", tk.END)
     
-    def on_contact_select(self, event):
+    def on_contact_select(self, event=None):
         """Handle contact selection"""
-        selected_item = self.tree.selection()
-        if selected_item:
-            contact_index = self.tree.index(selected_item[0])
-            
-            # Get the visible contact based on search
-            visible_contacts = []
-            search_term = self.search_var.get().lower()
-            
-            for contact in self.contacts:
-                if (search_term in contact['name'].lower() or
-                    search_term in contact['phone'].lower() or
-                    search_term in contact['email'].lower() or
-                    search_term in contact['address'].lower()):
-                    visible_contacts.append(contact)
-            
-            if contact_index < len(visible_contacts):
-                contact = visible_contacts[contact_index]
-                
-                self.clear_fields()
-                self.name_entry.insert(0, contact['name'])
-                self.phone_entry.insert(0, contact['phone'])
-                self.email_entry.insert(0, contact['email'])
-                self.address_text.insert("1.0", contact['address'])
+        contact_id = self.contact_list.selected_id
+        contact = self.store.get(contact_id) if contact_id is not None else None
+        if contact is not None:
+            self.clear_fields()
+            self.name_entry.insert(0, contact['name'])
+            self.phone_entry.insert(0, contact['phone'])
+            self.email_entry.insert(0, contact['email'])
+            self.address_text.insert("1.0", contact['address'])
     
     def on_contact_double_click(self, event):
         """Handle double-click on contact"""
@@ -690,34 +997,186 @@ class ModernContactManager:
     
     def refresh_contact_list(self):
         """Refresh the contact list display"""
-        self.search_contacts()
+        self.search_worker.request(self.search_var.get(), self.fuzzy_var.get(), self.sort, delay=0)
     
     def update_stats(self):
         """Update the statistics display"""
-        self.stats_label.config(text=f"Total Contacts: {len(self.contacts)}")
+        if self.loading:
+            self.stats_label.config(text=f"Loading… {len(self.store)} contacts")
+        else:
+            self.stats_label.config(text=f"Total Contacts: {len(self.store)}")
     
     def load_contacts(self):
-        """Load contacts from file"""
+        """Load contacts on a background thread, listing them as they arrive"""
+        def progress(batch):
+            self.root.after(0, self.show_load_progress)
+        
+        def run():
+            try:
+                self.store.load(progress=progress, cancelled=self.load_cancelled.is_set)
+            except Exception as e:
+                self.root.after(0, self.finish_loading, str(e))
+                return
+            self.root.after(0, self.finish_loading, None)
+        
+        self.loading = True
+        self.update_stats()
+        self.load_thread = threading.Thread(target=run, daemon=True)
+        self.load_thread.start()
+    
+    def show_load_progress(self):
+        """Show the contacts loaded so far"""
+        if self.loading:
+            self.update_stats()
+            self.refresh_contact_list()
+    
+    def finish_loading(self, error):
+        """Enable editing once every contact has loaded"""
+        if self.load_cancelled.is_set():
+            return  # the window is closing
+        self.loading = False
+        self.update_stats()
+        self.refresh_contact_list()
+        if error:
+            messagebox.showerror("Error", f"Failed to load contacts: {error}")
+            return
+        self.root.after(self.SYNC_INTERVAL, self.sync_contacts)
+    
+    def sync_contacts(self):
+        """Show edits other Contact Manager windows saved to the same file"""
         try:
-            if os.path.exists(self.contacts_file):
-                with open(self.contacts_file, 'r') as f:
-                    return json.load(f)
-            return []
+            changes = self.store.sync()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load contacts: {str(e)}")
-            return []
+            print(f"Error reading other windows' changes: {e}")
+            changes = None
+        if changes:
+            self.refresh_contact_list()
+            self.update_stats()
+        self.root.after(self.SYNC_INTERVAL, self.sync_contacts)
     
-    def save_contacts(self):
-        """Save contacts to file"""
+    def show_perf(self):
+        """Refresh the timings next to the contact count"""
+        self.perf_label.config(text=self.perf.summary_text())
+        self.root.after(self.SYNC_INTERVAL, self.show_perf)
+    
+    def perf_file(self, suffix):
+        """Timestamped file next to the contacts file for profiles and traces"""
+        stem = os.path.splitext(self.contacts_file)[0]
+        return f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+    
+    def dump_trace(self, event=None):
+        """F12: save the timed calls as a trace for chrome://tracing or Perfetto"""
+        path = self.perf_file(".trace.json")
+        try:
+            written = self.perf.dump_trace(path)
+        except OSError as e:
+            self.show_error_message("Profile Error", f"Failed to save timings: {str(e)}")
+            return
+        self.show_success_message("Timings Saved", f"Saved {written} timed calls to {path}")
+    
+    def toggle_profile(self, event=None):
+        """Shift+F12: start profiling the UI thread, or stop and save the profile"""
+        path = self.perf_file(".prof")
+        try:
+            started = self.perf.toggle_profile(path)
+        except OSError as e:
+            self.show_error_message("Profile Error", f"Failed to save profile: {str(e)}")
+            return
+        if started:
+            self.stats_label.config(text="Profiling… Shift+F12 to stop")
+        else:
+            self.update_stats()
+            self.show_success_message("Profile Saved", f"Saved profile to {path}")
+    
+    def check_loaded(self):
+        """False, after telling the user, while contacts are still loading"""
+        if self.loading:
+            self.show_error_message("Please Wait", "Contacts are still loading")
+            return False
+        return True
+    
+    def save_contacts(self, change, *args):
+        """Run a store change, reporting rejections and storage errors; False if it failed"""
         try:
-            with open(self.contacts_file, 'w') as f:
-                json.dump(self.contacts, f, indent=2)
+            change(*args)
+            return True
+        except ContactError as e:
+            self.show_error_message(e.title, e.message)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save contacts: {str(e)}")
+        return False
+    
+    def on_closing(self):
+        """Finish pending writes before the window goes away"""
+        if self.import_thread is not None and self.import_thread.is_alive():
+            # Stops after the current chunk; what was imported is still saved.
+            # Poll rather than join, since the import thread calls root.after
+            self.import_cancelled.set()
+            self.root.after(100, self.on_closing)
+            return
+        if self.load_thread is not None and self.load_thread.is_alive():
+            # Stops after the current batch without writing anything
+            self.load_cancelled.set()
+            self.root.after(100, self.on_closing)
+            return
+        self.store.close()
+        self.root.destroy()
+
+def run_export(contacts_file, path, fmt=None, search_term=''):
+    """Export contacts without starting the UI; returns the number written"""
+    store = ContactStore.open(contacts_file)
+    try:
+        return store.export(path, fmt, search_term)
+    finally:
+        store.close()
+
+def run_dedupe(contacts_file, merge=False):
+    """Print the duplicate groups without starting the UI, merging them if asked"""
+    store = ContactStore.open(contacts_file)
+    try:
+        groups, merges = contact_dedupe.plan_merges(store)
+        for group in groups:
+            print(" = ".join(f"{contact['name']} <{contact['phone']}>" for contact in group))
+        print(f"Found {len(groups)} groups of duplicates")
+        if merge and merges:
+            print(f"Merged {store.merge(merges)} groups")
+    finally:
+        store.close()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Contact Manager Pro")
+    parser.add_argument("contacts_file", nargs="?", default="contacts.json",
+                        help="contacts file to open; use a .db file for SQLite")
+    parser.add_argument("--export", metavar="PATH",
+                        help="export contacts to PATH and exit without opening a window")
+    parser.add_argument("--format", choices=sorted(contact_export.FORMATS),
+                        help="export format (default: from the PATH extension)")
+    parser.add_argument("--search", default="",
+                        help="only export contacts matching this search term")
+    parser.add_argument("--perf", action="store_true",
+                        help="show search, list and save timings in the header; "
+                             "F12 saves a trace, Shift+F12 starts and stops cProfile")
+    parser.add_argument("--find-duplicates", action="store_true",
+                        help="list groups of duplicate contacts and exit")
+    parser.add_argument("--merge-duplicates", action="store_true",
+                        help="merge groups of duplicate contacts and exit")
+    args = parser.parse_args(argv)
+    
+    if args.find_duplicates or args.merge_duplicates:
+        run_dedupe(args.contacts_file, merge=args.merge_duplicates)
+        return
+    
+    if args.export:
+        written = run_export(args.contacts_file, args.export, args.format, args.search)
+        print(f"Exported {written} contacts to {args.export}")
+        return
+    
     root = tk.Tk()
-    app = ModernContactManager(root)
+    app = ModernContactManager(root, args.contacts_file, perf=args.perf)
+    
+    # Handle window closing
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
+    
     root.mainloop()
 
 if __name__ == "__main__":
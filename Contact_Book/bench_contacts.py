@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from contact_perf import percentile
+from contact_storage import ContactRecord
+from contact_store import ContactStore
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+               'Amit', 'Priya', 'Wei', 'Yuki', 'Carlos', 'Sofia', 'Ahmed', 'Fatima',
+               'Olga', 'Ivan', 'Chloe', 'Lucas', 'Noah', 'Emma', 'Liam', 'Ava']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Tiwari', 'Sharma', 'Chen', 'Tanaka', 'Lopez', 'Rossi', 'Khan', 'Ali',
+              'Ivanova', 'Petrov', 'Martin', 'Dubois', 'Taylor', 'Moore', 'Clark', 'Lee']
+STREETS = ['Main St', 'Oak Ave', 'Park Rd', 'Station Rd', 'High St', 'Lake View', 'Hill Lane']
+CITIES = ['Springfield', 'Riverside', 'Lucknow', 'Pune', 'Osaka', 'Lyon', 'Austin', 'Leeds']
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'example.org', 'mail.co']
+
+BACKEND_FILES = {'json': 'contacts.json', 'sqlite': 'contacts.db'}
+
+# Substring searches from broad to no match; each round runs them in this
+# order so the JSON backend's single-term result cache never serves a hit
+SEARCH_TERMS = ['a', 'jo', 'smi', 'main st', 'tiwari', '555 00', 'zzqx']
+# Typos and sound-alikes for fuzzy name search
+FUZZY_TERMS = ['jon', 'jhon smit', 'tiwary', 'prya', 'garsia m', 'xyzzy']
+# Column sorts as the list headings produce them, each paged at top, middle and end
+SORTS = [(('name', False),), (('email', True),), (('phone', False), ('name', False))]
+
+
+def synthetic_contacts(count, seed=0, start=0):
+    """Yield count reproducible contacts with unique name, phone and email"""
+    rng = random.Random(seed * 1_000_003 + start)
+    for i in range(start, start + count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        yield {
+            'name': f"{first} {last} {i}",
+            'phone': f"+1 {555 + i // 10_000_000} {i % 10_000_000:07d}",
+            'email': f"{first}.{last}{i}@{rng.choice(DOMAINS)}".lower(),
+            'address': f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+        }
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def persist_all(store):
+    """Force everything to disk the way each backend would"""
+    backend = store.backend
+    if hasattr(backend, 'storage'):
+        backend.storage.save_all(list(backend.contacts.values()))
+    else:
+        backend.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def bench(backend_name, size, seed, adds, rounds, workdir):
+    """Run every benchmark for one backend and book size; returns a result dict"""
+    path = os.path.join(workdir, BACKEND_FILES[backend_name])
+    result = {'backend': backend_name, 'size': size}
+
+    store = ContactStore.open(path)
+    seconds, report = timed(store.bulk_add, synthetic_contacts(size, seed))
+    assert report.imported == size, report.summary()
+    result['bulk_add_rows_per_s'] = size / seconds
+
+    seconds, _ = timed(persist_all, store)
+    result['save_s'] = seconds
+    store.close()
+
+    seconds, store = timed(ContactStore.open, path)
+    result['load_s'] = seconds
+
+    latencies = []
+    for _ in range(rounds):
+        for term in SEARCH_TERMS:
+            start = time.perf_counter()
+            store.count(term)
+            store.page(term, 0, 20)
+            latencies.append(time.perf_counter() - start)
+    result['search_p50_ms'] = percentile(latencies, 0.5) * 1000
+    result['search_p95_ms'] = percentile(latencies, 0.95) * 1000
+
+    latencies = []
+    for _ in range(rounds):
+        for sort in SORTS:
+            start = time.perf_counter()
+            total = store.count('', sort=sort)
+            for offset in (0, total // 2, max(0, total - 20)):
+                store.page('', offset, 20, sort=sort)
+            latencies.append(time.perf_counter() - start)
+    result['sort_p50_ms'] = percentile(latencies, 0.5) * 1000
+    result['sort_p95_ms'] = percentile(latencies, 0.95) * 1000
+
+    # The first fuzzy search builds the index; time that separately
+    seconds, _ = timed(store.fuzzy_matches, FUZZY_TERMS[0])
+    result['fuzzy_build_s'] = seconds
+    latencies = []
+    for _ in range(rounds):
+        for term in FUZZY_TERMS:
+            start = time.perf_counter()
+            store.count(term, fuzzy=True)
+            store.page(term, 0, 20, fuzzy=True)
+            latencies.append(time.perf_counter() - start)
+    result['fuzzy_p50_ms'] = percentile(latencies, 0.5) * 1000
+    result['fuzzy_p95_ms'] = percentile(latencies, 0.95) * 1000
+
+    latencies = []
+    for contact in synthetic_contacts(adds, seed, start=size):
+        start = time.perf_counter()
+        store.add(contact['name'], contact['phone'], contact['email'], contact['address'])
+        latencies.append(time.perf_counter() - start)
+    result['add_p50_ms'] = percentile(latencies, 0.5) * 1000
+    result['add_p95_ms'] = percentile(latencies, 0.95) * 1000
+    result['add_ops_per_s'] = adds / sum(latencies)
+
+    store.close()
+    return result
+
+
+def traced(function, *args):
+    """Return (bytes still allocated, peak bytes allocated) by function(*args)"""
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(size, seed, workdir):
+    """Memory of the in-memory (JSON) model for one book size"""
+    path = os.path.join(workdir, BACKEND_FILES['json'])
+    store = ContactStore.open(path)
+    store.bulk_add(synthetic_contacts(size, seed))
+    store.close()
+    contacts = [dict(contact, id=str(number))
+                for number, contact in enumerate(synthetic_contacts(size, seed))]
+    result = {'size': size}
+    kept = []
+
+    # Plain dicts as the contacts used to be held, against ContactRecords
+    result['dict_mb'] = traced(lambda: kept.append([dict(c) for c in contacts]))[0] / 1e6
+    result['record_mb'] = traced(
+        lambda: kept.append([ContactRecord.from_dict(c) for c in contacts]))[0] / 1e6
+    result['record_saving_pct'] = 100 * (1 - result['record_mb'] / result['dict_mb'])
+    kept.clear()
+
+    # Everything the store holds after loading: records plus indexes
+    result['store_mb'] = traced(lambda: kept.append(ContactStore.open(path)))[0] / 1e6
+    store = kept.pop()
+    # Short-lived garbage of a broad and a verified search
+    for key, term in (('search_a_peak_kb', 'a'), ('search_st_peak_kb', 'main st')):
+        store.backend.result = None
+        result[key] = traced(store.count, term)[1] / 1e3
+    store.close()
+    return result
+
+
+# (result key, header, width, format spec)
+COLUMNS = [
+    ('backend', 'backend', 7, ''), ('size', 'size', 8, 'd'),
+    ('bulk_add_rows_per_s', 'bulk rows/s', 12, '.0f'),
+    ('save_s', 'save s', 8, '.3f'), ('load_s', 'load s', 8, '.3f'),
+    ('search_p50_ms', 'srch p50ms', 10, '.2f'), ('search_p95_ms', 'srch p95ms', 10, '.2f'),
+    ('sort_p50_ms', 'sort p50ms', 10, '.2f'), ('sort_p95_ms', 'sort p95ms', 10, '.2f'),
+    ('fuzzy_build_s', 'fuzzy idx s', 11, '.3f'),
+    ('fuzzy_p50_ms', 'fuzz p50ms', 10, '.2f'), ('fuzzy_p95_ms', 'fuzz p95ms', 10, '.2f'),
+    ('add_p50_ms', 'add p50ms', 9, '.2f'), ('add_p95_ms', 'add p95ms', 9, '.2f'),
+    ('add_ops_per_s', 'adds/s', 8, '.0f'),
+]
+MEMORY_COLUMNS = [
+    ('size', 'size', 8, 'd'), ('dict_mb', 'dicts MB', 9, '.1f'),
+    ('record_mb', 'records MB', 10, '.1f'), ('record_saving_pct', 'saved %', 8, '.0f'),
+    ('store_mb', 'store MB', 9, '.1f'),
+    ('search_a_peak_kb', "'a' peak KB", 12, '.0f'),
+    ('search_st_peak_kb', "'main st' KB", 13, '.0f'),
+]
+
+
+def header(columns):
+    return " ".join(f"{title:>{width}}" for _, title, width, _ in columns)
+
+
+def row(columns, result):
+    return " ".join(f"{result[key]:>{width}{spec}}" for key, _, width, spec in columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark ContactStore load, search, sorting, fuzzy search, "
+                    "add-with-dedupe and save on synthetic contact books")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated book sizes (default: %(default)s)")
+    parser.add_argument("--backends", default="json,sqlite",
+                        help="comma separated backends: json, sqlite (default: %(default)s)")
+    parser.add_argument("--adds", type=int, default=200,
+                        help="single adds timed per run (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="passes over the search terms (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the synthetic data (default: %(default)s)")
+    parser.add_argument("--memory", action="store_true",
+                        help="measure memory of the in-memory model instead (uses tracemalloc)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="also write the results as JSON for regression tracking")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    backends = args.backends.split(',')
+
+    columns = MEMORY_COLUMNS if args.memory else COLUMNS
+    runs = [(None, size) for size in sizes] if args.memory else [
+        (backend_name, size) for backend_name in backends for size in sizes]
+
+    print(header(columns))
+    results = []
+    for backend_name, size in runs:
+        workdir = tempfile.mkdtemp(prefix="contacts-bench-")
+        try:
+            if args.memory:
+                result = bench_memory(size, args.seed, workdir)
+            else:
+                result = bench(backend_name, size, args.seed, args.adds, args.rounds, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        results.append(result)
+        print(row(columns, result), flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
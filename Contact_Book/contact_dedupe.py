@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+
+from contact_fuzzy import edit_distance, soundex, words
+from contact_storage import normalize_phone
+
+FIELDS = ('name', 'phone', 'email', 'address')
+
+PHONE_DIGITS = 9       # trailing digits compared, so country codes and trunk zeros don't matter
+MAX_BLOCK = 50         # blocks up to this size are compared all-pairs
+WINDOW = 10            # in bigger blocks, each contact is compared with its next WINDOW by name
+THRESHOLD = 0.65       # pair score from which two contacts count as one person
+TASK_COMPARISONS = 20000  # comparisons handed to a worker process at a time
+PARALLEL_MIN = 100000  # fewer contacts than this are compared in this process
+
+# Pair score weights; names alone never reach THRESHOLD
+NAME_WEIGHT, PHONE_WEIGHT, EMAIL_WEIGHT = 0.4, 0.35, 0.25
+
+
+def phone_key(phone):
+    """Trailing digits of a phone number, or '' if it has too few to compare"""
+    digits = normalize_phone(phone)
+    return digits[-PHONE_DIGITS:] if len(digits) >= 7 else ''
+
+
+def email_key(email):
+    """The mailbox an address delivers to: lowercase, no +tag, no dots for Gmail"""
+    local, at, domain = email.strip().lower().rpartition('@')
+    if not at:
+        return ''
+    local = local.split('+', 1)[0]
+    if domain in ('gmail.com', 'googlemail.com'):
+        local = local.replace('.', '')
+        domain = 'gmail.com'
+    return f"{local}@{domain}"
+
+
+def name_key(name):
+    """Casefolded name words in sorted order, so 'Smith, John' compares as 'John Smith'"""
+    return ' '.join(sorted(words(name)))
+
+
+def sound_key(name):
+    """Soundex codes of the first and last words of a name, e.g. Jon Smyth -> J500 S530"""
+    codes = [code for code in map(soundex, (word for word in words(name) if word.isalpha()))
+             if code]
+    if not codes:
+        return ''
+    return ' '.join(sorted({codes[0], codes[-1]}))
+
+
+def blocking_keys(record):
+    """Keys of the blocks a contact goes in; only contacts sharing a block are compared"""
+    name, phone, email, sound = record
+    keys = []
+    if phone:
+        keys.append('p' + phone)
+    if email:
+        keys.append('e' + email)
+    if sound:
+        keys.append('n' + sound)
+    return keys
+
+
+def similarity(a, b):
+    """1 for equal strings down to 0 for nothing in common, by edit distance"""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    return 1 - edit_distance(a, b) / longest
+
+
+def match_score(a, b):
+    """0..1 score that two contact records are the same person"""
+    score = 0.0
+    if a[1] and a[1] == b[1]:
+        score += PHONE_WEIGHT
+    if a[2] and a[2] == b[2]:
+        score += EMAIL_WEIGHT
+    # Skip the edit distance when even identical names couldn't reach THRESHOLD
+    if score + NAME_WEIGHT >= THRESHOLD:
+        score += NAME_WEIGHT * similarity(a[0], b[0])
+    return score
+
+
+def block_pairs(block):
+    """Yield the pairs of (position, record) entries of a block worth comparing
+
+    Small blocks are compared all-pairs. Common names make big blocks, so
+    those are sorted by name and each entry compared with its next WINDOW
+    (the sorted neighbourhood method).
+    """
+    if len(block) > MAX_BLOCK:
+        block = sorted(block, key=lambda entry: entry[1][0])
+        for position, entry in enumerate(block):
+            for other in block[position + 1:position + 1 + WINDOW]:
+                yield entry, other
+    else:
+        for position, entry in enumerate(block):
+            for other in block[position + 1:]:
+                yield entry, other
+
+
+def comparisons(block):
+    if len(block) > MAX_BLOCK:
+        return len(block) * WINDOW
+    return len(block) * (len(block) - 1) // 2
+
+
+def score_blocks(blocks):
+    """Return the (position, position) pairs in blocks that score as one person
+
+    Runs in worker processes, so blocks carry their own records.
+    """
+    matches = []
+    for block in blocks:
+        for (a, record_a), (b, record_b) in block_pairs(block):
+            if match_score(record_a, record_b) >= THRESHOLD:
+                matches.append((a, b))
+    return matches
+
+
+def tasks(blocks, records):
+    """Group blocks into lists of about TASK_COMPARISONS comparisons each"""
+    task = []
+    size = 0
+    for block in blocks:
+        task.append([(position, records[position]) for position in block])
+        size += comparisons(block)
+        if size >= TASK_COMPARISONS:
+            yield task
+            task = []
+            size = 0
+    if task:
+        yield task
+
+
+def find(parent, position):
+    """Union-find root of position, pointing the path straight at it"""
+    root = position
+    while parent[root] != root:
+        root = parent[root]
+    while parent[position] != root:
+        parent[position], position = root, parent[position]
+    return root
+
+
+def find_duplicates(contacts, processes=None):
+    """Return groups of contacts that look like the same person
+
+    Contacts are put in blocks by trailing phone digits, normalized email
+    and the sound of their name, and only contacts sharing a block are
+    scored, instead of every pair. Matching pairs are joined into groups
+    with union-find. Large books are scored on processes worker processes
+    (default: one per CPU). Each group lists its contacts in the order
+    they were given.
+    """
+    contacts = list(contacts)
+    records = []
+    blocks = {}
+    for position, contact in enumerate(contacts):
+        record = (name_key(contact['name']), phone_key(contact['phone']),
+                  email_key(contact['email']), sound_key(contact['name']))
+        records.append(record)
+        for key in blocking_keys(record):
+            blocks.setdefault(key, []).append(position)
+    candidates = [block for block in blocks.values() if len(block) > 1]
+    del blocks
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(contacts) < PARALLEL_MIN:
+        results = map(score_blocks, tasks(candidates, records))
+        pool = None
+    else:
+        # Spawned rather than forked: the UI calls this with other threads running
+        pool = multiprocessing.get_context('spawn').Pool(processes)
+        results = pool.imap_unordered(score_blocks, tasks(candidates, records))
+
+    parent = {}  # position -> parent position, for every matched contact
+    try:
+        for matches in results:
+            for a, b in matches:
+                parent.setdefault(a, a)
+                parent.setdefault(b, b)
+                root_a, root_b = find(parent, a), find(parent, b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    groups = {}
+    for position in sorted(parent):
+        groups.setdefault(find(parent, position), []).append(contacts[position])
+    return list(groups.values())
+
+
+def merge_group(group):
+    """Return (merged contact, ids of the contacts folded into it, group) for a group
+
+    The contact with the most fields filled in survives, the first one on
+    a tie, and its empty fields are filled from the others in order. The
+    group is passed along so ContactStore.merge can tell if any of its
+    contacts changed since.
+    """
+    survivor = max(group, key=lambda contact: sum(1 for field in FIELDS if contact[field]))
+    merged = {'id': survivor['id'], **{field: survivor[field] for field in FIELDS}}
+    for contact in group:
+        for field in FIELDS:
+            if not merged[field] and contact[field]:
+                merged[field] = contact[field]
+    return (merged, [contact['id'] for contact in group if contact['id'] != survivor['id']],
+            [dict(contact) for contact in group])
+
+
+def plan_merges(store, processes=None):
+    """Find the duplicate groups in a ContactStore; returns (groups, merges)"""
+    groups = find_duplicates(store.iter_contacts(), processes)
+    return groups, [merge_group(group) for group in groups]
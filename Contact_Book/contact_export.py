@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+
+FIELDS = ('name', 'phone', 'email', 'address')
+
+
+class LineBuffer:
+    """File-like sink that hands back whatever csv.writer wrote last"""
+
+    def __init__(self):
+        self.line = ''
+
+    def write(self, text):
+        self.line = text
+
+
+def csv_lines(contacts):
+    """Yield a CSV header and one CSV line per contact"""
+    buffer = LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    yield buffer.line
+    for contact in contacts:
+        writer.writerow([contact[field] for field in FIELDS])
+        yield buffer.line
+
+
+def jsonl_lines(contacts):
+    """Yield one JSON object per line, per contact"""
+    for contact in contacts:
+        yield json.dumps(contact, ensure_ascii=False, default=dict) + "\n"
+
+
+def escape_vcard(value):
+    return (value.replace('\\', '\\\\').replace(',', '\\,')
+            .replace(';', '\\;').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def vcard_lines(contacts):
+    """Yield a vCard 3.0 card per contact"""
+    for contact in contacts:
+        card = ["BEGIN:VCARD", "VERSION:3.0",
+                f"FN:{escape_vcard(contact['name'])}",
+                f"N:;{escape_vcard(contact['name'])};;;",
+                f"TEL:{escape_vcard(contact['phone'])}"]
+        if contact['email']:
+            card.append(f"EMAIL:{escape_vcard(contact['email'])}")
+        if contact['address']:
+            card.append(f"ADR:;;{escape_vcard(contact['address'])};;;;")
+        card.append("END:VCARD")
+        yield "\r\n".join(card) + "\r\n"
+
+
+FORMATS = {
+    'csv': csv_lines,
+    'jsonl': jsonl_lines,
+    'vcf': vcard_lines,
+}
+
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.vcf': 'vcf', '.vcard': 'vcf'}
+
+
+def format_for(path):
+    """Guess the export format from a file name, defaulting to CSV"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def export_contacts(source, path, fmt=None, search_term=''):
+    """Stream the contacts matching search_term to path; returns how many were written
+
+    source is a ContactStore or storage backend; anything with iter_contacts.
+    """
+    fmt = fmt or format_for(path)
+    lines = FORMATS[fmt]
+    written = 0
+
+    def counted(contacts):
+        nonlocal written
+        for contact in contacts:
+            written += 1
+            yield contact
+
+    # Line endings are written exactly as generated (CRLF for CSV and vCard)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(lines(counted(source.iter_contacts(search_term))))
+    return written
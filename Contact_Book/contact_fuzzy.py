@@ -0,0 +1,230 @@
+import re
+from bisect import bisect_left
+
+from contact_storage import SearchCancelled
+
+WORD_RE = re.compile(r'\w+')
+
+SOUNDEX_CODES = {}
+for letters, digit in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'),
+                       ('l', '4'), ('mn', '5'), ('r', '6')):
+    for letter in letters:
+        SOUNDEX_CODES[letter] = digit
+
+
+def words(text):
+    """Split text into casefolded words"""
+    return WORD_RE.findall(text.casefold())
+
+
+def soundex(word):
+    """American Soundex code of a word, e.g. Robert -> R163; '' if it has no a-z letters"""
+    letters = [c for c in word.lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w don't separate letters with the same code; vowels do
+        if letter not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def edit_distance(a, b):
+    """Levenshtein distance, using the bit-parallel algorithm of Myers/Hyyrö"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    masks = {}
+    for position, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    positive, negative = full, 0
+    distance = len(b)
+    for char in a:
+        match = masks.get(char, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        up = negative | ~(horizontal | positive)
+        down = positive & horizontal
+        if up & last:
+            distance += 1
+        if down & last:
+            distance -= 1
+        up = ((up << 1) | 1) & full
+        down = (down << 1) & full
+        positive = (down | ~(vertical | up)) & full
+        negative = up & vertical
+    return distance
+
+
+class BKTree:
+    """Burkhard-Keller tree of words for edit-distance lookups
+
+    Each node is [word, {distance: child}]; the triangle inequality lets a
+    lookup skip every subtree outside distance ± tolerance.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, word):
+        if self.root is None:
+            self.root = [word, {}]
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                return
+            node = child
+
+    def search(self, word, tolerance):
+        """Yield (word, distance) for every stored word within tolerance"""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= tolerance:
+                yield node_word, distance
+            for child_distance in range(distance - tolerance, distance + tolerance + 1):
+                child = children.get(child_distance)
+                if child is not None:
+                    stack.append(child)
+
+
+class FuzzyNameIndex:
+    """Typo tolerant, phonetic and prefix lookup over contact name words
+
+    Keeps each contact's name words, a BK-tree over all distinct words and
+    a Soundex key per word, so a query never scans every contact.
+    """
+
+    # Score per kind of word match; lower ranks first
+    EXACT, PREFIX, PHONETIC = 0, 0.5, 1.25
+
+    def __init__(self):
+        self.word_ids = {}      # word -> set of contact ids
+        self.sounds = {}        # soundex code -> set of words
+        self.names = {}         # contact id -> casefolded name, for ordering ties
+        self.tree = BKTree()
+        self.sorted_words = []  # for prefix lookups; rebuilt after new words
+        self.sorted_stale = False
+
+    @staticmethod
+    def tolerance(word):
+        """Edits allowed for a query word; short words must match exactly"""
+        if len(word) <= 2:
+            return 0
+        if len(word) <= 5:
+            return 1
+        return 2
+
+    def build(self, contacts):
+        for contact in contacts:
+            self.add(contact)
+
+    def add(self, contact):
+        name = contact['name'].casefold()
+        self.names[contact['id']] = name
+        for word in set(words(name)):
+            ids = self.word_ids.get(word)
+            if ids is None:
+                self.word_ids[word] = {contact['id']}
+                self.sorted_stale = True
+                # Typos and sound-alikes only make sense for words, not numbers
+                if word.isalpha():
+                    self.tree.add(word)
+                    code = soundex(word)
+                    if code:
+                        self.sounds.setdefault(code, set()).add(word)
+            else:
+                ids.add(contact['id'])
+
+    def remove(self, contact_id):
+        # Words left without contacts stay in the tree and are skipped by search
+        name = self.names.pop(contact_id, None)
+        if name is None:
+            return
+        for word in set(words(name)):
+            self.word_ids[word].discard(contact_id)
+
+    def replace(self, contact):
+        self.remove(contact['id'])
+        self.add(contact)
+
+    def prefixed(self, prefix):
+        """Yield the indexed words starting with prefix"""
+        if self.sorted_stale:
+            self.sorted_words = sorted(self.word_ids)
+            self.sorted_stale = False
+        position = bisect_left(self.sorted_words, prefix)
+        while position < len(self.sorted_words) and self.sorted_words[position].startswith(prefix):
+            yield self.sorted_words[position]
+            position += 1
+
+    def word_scores(self, query_word, cancelled=None):
+        """Return {word: score} for the indexed words matching query_word"""
+        scores = {}
+
+        def offer(word, score):
+            if score < scores.get(word, score + 1):
+                scores[word] = score
+
+        for position, word in enumerate(self.prefixed(query_word)):
+            if cancelled is not None and position % 4096 == 0 and cancelled():
+                raise SearchCancelled()
+            offer(word, self.EXACT if word == query_word else self.PREFIX)
+        for word, distance in self.tree.search(query_word, self.tolerance(query_word)):
+            offer(word, distance)
+        code = soundex(query_word) if query_word.isalpha() and len(query_word) > 2 else ''
+        if code:
+            for word in self.sounds.get(code, ()):
+                offer(word, self.PHONETIC)
+        return scores
+
+    def search(self, search_term, cancelled=None):
+        """Return the ids of contacts matching every word of search_term, best first
+
+        A contact's score sums its best match for each query word: exact,
+        prefix, edit distance or same Soundex code. Ties sort by name.
+        cancelled is polled as in ContactSearchIndex.search.
+        """
+        best = None
+        for query_word in words(search_term):
+            contact_scores = {}
+            for word, score in self.word_scores(query_word, cancelled).items():
+                for contact_id in self.word_ids[word]:
+                    if score < contact_scores.get(contact_id, score + 1):
+                        contact_scores[contact_id] = score
+            if cancelled is not None and cancelled():
+                raise SearchCancelled()
+            if best is None:
+                best = contact_scores
+            else:
+                best = {contact_id: score + contact_scores[contact_id]
+                        for contact_id, score in best.items() if contact_id in contact_scores}
+            if not best:
+                break
+
+        if not best:
+            return []
+        names = self.names
+        return sorted(best, key=lambda contact_id: (best[contact_id], names[contact_id]))
@@ -0,0 +1,98 @@
+import csv
+import os
+
+# Header spellings accepted for each contact field in CSV files
+CSV_HEADERS = {
+    'name': ('name', 'full name', 'fullname', 'display name'),
+    'phone': ('phone', 'phone number', 'mobile', 'telephone', 'tel'),
+    'email': ('email', 'email address', 'e-mail', 'mail'),
+    'address': ('address', 'street address', 'home address'),
+}
+
+
+def read_csv(path):
+    """Yield contact fields from a CSV file with a header row"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [column.strip().lower() for column in next(reader, [])]
+        columns = {}
+        for field, names in CSV_HEADERS.items():
+            for position, column in enumerate(header):
+                if column in names:
+                    columns[field] = position
+                    break
+        if 'name' not in columns or 'phone' not in columns:
+            raise ValueError("CSV file needs at least name and phone columns")
+
+        for row in reader:
+            yield {field: row[position] if position < len(row) else ''
+                   for field, position in columns.items()}
+
+
+def unfold_vcard_lines(f):
+    """Yield logical vCard lines, joining folded continuation lines"""
+    current = None
+    for line in f:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def unescape_vcard(value):
+    return (value.replace('\\n', ' ').replace('\\N', ' ')
+            .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def read_vcard(path):
+    """Yield contact fields from a vCard (.vcf) file, one per card"""
+    with open(path, encoding='utf-8-sig') as f:
+        card = None
+        for line in unfold_vcard_lines(f):
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            # Property name without parameters or group prefix, e.g. item1.TEL;TYPE=cell
+            prop = key.split(';', 1)[0].split('.')[-1].upper()
+
+            if prop == 'BEGIN' and value.strip().upper() == 'VCARD':
+                card = {}
+            elif prop == 'END' and value.strip().upper() == 'VCARD':
+                if card is not None:
+                    yield card
+                card = None
+            elif card is None:
+                continue
+            elif prop == 'FN':
+                card['name'] = unescape_vcard(value)
+            elif prop == 'N' and 'name' not in card:
+                parts = [unescape_vcard(part) for part in value.split(';')]
+                card['name'] = ' '.join(part for part in parts[1::-1] if part)
+            elif prop == 'TEL' and 'phone' not in card:
+                card['phone'] = value.replace('tel:', '')
+            elif prop == 'EMAIL' and 'email' not in card:
+                card['email'] = value
+            elif prop == 'ADR' and 'address' not in card:
+                parts = [unescape_vcard(part).strip() for part in value.split(';')]
+                card['address'] = ', '.join(part for part in parts if part)
+
+
+def read_contacts(path):
+    """Pick the reader from the file extension"""
+    if os.path.splitext(path)[1].lower() in ('.vcf', '.vcard'):
+        return read_vcard(path)
+    return read_csv(path)
+
+
+def import_contacts(store, path, chunk_size=None, progress=None, cancelled=None):
+    """Stream contacts from a CSV or vCard file into a ContactStore
+
+    Returns the ImportReport from ContactStore.bulk_add, which does the
+    validation, deduplication and batching.
+    """
+    return store.bulk_add(read_contacts(path), chunk_size, progress, cancelled)
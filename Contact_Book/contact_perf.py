@@ -0,0 +1,112 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PerfMonitor:
+    """Opt-in timing of the Contact Manager's hot paths
+
+    instrument() swaps a method on one object for a timed wrapper, so
+    nothing is wrapped, and nothing costs anything, unless the monitor is
+    enabled. The last WINDOW calls of each operation feed rolling
+    percentiles, and every call is also kept as a Chrome trace event
+    (chrome://tracing, Perfetto) until TRACE_LIMIT of them have piled up.
+    """
+
+    WINDOW = 200          # calls per operation the percentiles cover
+    TRACE_LIMIT = 100000  # most recent trace events kept
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.samples = {}  # operation -> deque of (seconds, rows)
+        self.events = deque(maxlen=self.TRACE_LIMIT)
+        self.lock = threading.Lock()  # searches are timed on the worker thread
+        self.profiler = None
+        self.origin = time.perf_counter()
+
+    def record(self, name, start, seconds, rows=None):
+        """Add one timed call of operation name"""
+        event = {'name': name, 'ph': 'X', 'pid': os.getpid(),
+                 'tid': threading.get_ident(),
+                 'ts': (start - self.origin) * 1e6, 'dur': seconds * 1e6}
+        if rows is not None:
+            event['args'] = {'rows': rows}
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.WINDOW)
+            samples.append((seconds, rows))
+            self.events.append(event)
+
+    def instrument(self, obj, method, name=None, rows=None):
+        """Time every call of obj.method, if enabled
+
+        rows, if given, maps the call's result to the number of rows it
+        handled, e.g. len for a page of contacts.
+        """
+        if not self.enabled:
+            return
+        function = getattr(obj, method)
+        name = name or method
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            self.record(name, start, time.perf_counter() - start,
+                        rows(result) if rows else None)
+            return result
+
+        setattr(obj, method, timed)
+
+    def summary(self):
+        """Return {operation: (calls, p50 seconds, p95 seconds, last row count)}"""
+        with self.lock:
+            snapshot = {name: list(samples) for name, samples in self.samples.items()}
+        result = {}
+        for name, samples in snapshot.items():
+            seconds = [sample[0] for sample in samples]
+            result[name] = (len(samples), percentile(seconds, 0.5), percentile(seconds, 0.95),
+                            samples[-1][1])
+        return result
+
+    def summary_text(self):
+        """One short entry per operation, e.g. 'search 1.2/4.8 ms ×340'"""
+        entries = []
+        for name, (calls, p50, p95, rows) in sorted(self.summary().items()):
+            entry = f"{name} {p50 * 1000:.1f}/{p95 * 1000:.1f} ms"
+            if rows is not None:
+                entry += f" ×{rows}"
+            entries.append(entry)
+        return "  ·  ".join(entries) or "No timings yet"
+
+    def dump_trace(self, path):
+        """Write the kept calls as a trace-event JSON file; returns how many"""
+        with self.lock:
+            events = list(self.events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+    def toggle_profile(self, path):
+        """Start cProfile on this thread, or stop it and save the stats to path
+
+        Returns True if profiling has just started.
+        """
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            return True
+        self.profiler.disable()
+        self.profiler.dump_stats(path)
+        self.profiler = None
+        return False
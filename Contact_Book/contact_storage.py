@@ -0,0 +1,1428 @@
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+from contextlib import contextmanager
+from itertools import groupby
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SearchCancelled(Exception):
+    """Raised when a search is abandoned because a newer one superseded it"""
+
+
+# Joins the lowercased fields of a ContactRecord; never typed into a search
+SEPARATOR = '\0'
+
+
+class ContactRecord(Mapping):
+    """One contact, read like the dict it replaces in less memory
+
+    Only the fields are kept. The casefolded copy searches need is made
+    on demand: the n-gram index is consulted first, so only the few
+    candidates of a long term are ever folded.
+    """
+
+    __slots__ = ('id', 'name', 'phone', 'email', 'address')
+    KEYS = ('id', 'name', 'phone', 'email', 'address')
+
+    def __init__(self, id, name, phone, email, address):
+        self.id = id
+        self.name = name
+        self.phone = phone
+        self.email = email
+        self.address = address
+
+    @property
+    def folded(self):
+        """The casefolded searchable fields joined by SEPARATOR"""
+        return SEPARATOR.join((self.name, self.phone, self.email, self.address)).casefold()
+
+    def contains(self, folded_term):
+        """True if any field, casefolded, contains the casefolded folded_term"""
+        return (folded_term in self.name.casefold() or folded_term in self.phone.casefold()
+                or folded_term in self.email.casefold() or folded_term in self.address.casefold())
+
+    @classmethod
+    def from_dict(cls, contact):
+        """Make a record from a contact dict; a record is returned as it is"""
+        if isinstance(contact, cls):
+            return contact
+        return cls(contact['id'], contact.get('name', ''), contact.get('phone', ''),
+                   contact.get('email', ''), contact.get('address', ''))
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return f"ContactRecord({dict(self)!r})"
+
+
+class ContactSearchIndex:
+    """In-memory n-gram index over the searchable fields of ContactRecords
+
+    Postings are ascending arrays of 32-bit doc numbers rather than sets,
+    which keeps the index several times smaller and already in list order.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        self.postings = {}  # gram -> array of doc numbers, ascending
+        self.docs = []      # doc number -> contact, None once removed
+        self.doc_of = {}    # contact id -> doc number
+
+    def build(self, contacts):
+        """Index every contact from scratch"""
+        self.postings.clear()
+        self.docs.clear()
+        self.doc_of.clear()
+        for contact in contacts:
+            self.add(contact)
+
+    def grams(self, contact):
+        """Return every 1..GRAM_SIZE character gram of the contact fields"""
+        grams = set()
+        for value in contact.folded.split(SEPARATOR):
+            grams.update(value[start:start + size]
+                         for size in range(1, self.GRAM_SIZE + 1)
+                         for start in range(len(value) - size + 1))
+        return grams
+
+    def add(self, contact, doc=None):
+        """Index a contact, appending it unless a doc number is given"""
+        postings = self.postings
+        if doc is None:
+            # Newest doc number, so it goes on the end of every posting
+            doc = len(self.docs)
+            self.docs.append(contact)
+            for gram in self.grams(contact):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = array('I', (doc,))
+                else:
+                    posting.append(doc)
+        else:
+            self.docs[doc] = contact
+            for gram in self.grams(contact):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = array('I', (doc,))
+                else:
+                    insort(posting, doc)
+        self.doc_of[contact.id] = doc
+
+    def remove(self, contact):
+        """Drop a contact from the index and return its doc number"""
+        doc = self.doc_of.pop(contact.id)
+        for gram in self.grams(contact):
+            posting = self.postings[gram]
+            del posting[bisect_left(posting, doc)]
+            if not posting:
+                del self.postings[gram]
+        self.docs[doc] = None
+        return doc
+
+    def replace(self, old_contact, new_contact):
+        """Re-index an edited contact, keeping its position"""
+        doc = self.remove(old_contact)
+        self.add(new_contact, doc)
+
+    def search(self, search_term, cancelled=None):
+        """Return contacts containing search_term in any field, in list order
+
+        cancelled, if given, is polled while collecting results and raises
+        SearchCancelled once it returns True.
+        """
+        if not search_term:
+            candidates = range(len(self.docs))
+            verify = False
+        elif len(search_term) <= self.GRAM_SIZE:
+            # Every short substring is indexed, so the posting is exact
+            candidates = self.postings.get(search_term, ())
+            verify = False
+        else:
+            # Check the rarest gram's contacts for the whole term
+            candidates = min((self.postings.get(search_term[i:i + self.GRAM_SIZE], ())
+                              for i in range(len(search_term) - self.GRAM_SIZE + 1)), key=len)
+            verify = True
+
+        docs = self.docs
+        result = []
+        for position, doc in enumerate(candidates):
+            if cancelled is not None and position % 4096 == 0 and cancelled():
+                raise SearchCancelled()
+            contact = docs[doc]
+            if contact is not None and (not verify or contact.contains(search_term)):
+                result.append(contact)
+        return result
+
+
+SORT_FIELDS = ('name', 'phone', 'email', 'address')
+
+
+def sort_contacts(contacts, sort):
+    """Return contacts ordered by sort, a sequence of (field, descending) pairs
+
+    Fields compare ignoring case. Python's sort is stable, so sorting by
+    each field from the last to the first orders by all of them; ties keep
+    the incoming order, reversed along with a descending first field.
+    """
+    result = list(contacts)
+    if sort and sort[0][1]:
+        result.reverse()
+    for field, descending in reversed(sort):
+        result.sort(key=lambda contact: contact[field].casefold(), reverse=descending)
+    return result
+
+
+class ContactSortIndex:
+    """A ContactSearchIndex's doc numbers kept in order of each field
+
+    An order is built the first time its field is sorted on and from then
+    on kept current by bisection as contacts change, so sorting a result
+    is a walk over the order rather than a fresh sort.
+    """
+
+    def __init__(self, search_index):
+        self.search_index = search_index
+        self.orders = {}  # field -> array of doc numbers by (folded value, doc)
+
+    def clear(self):
+        self.orders.clear()
+
+    def key(self, field):
+        docs = self.search_index.docs
+        return lambda doc: (docs[doc][field].casefold(), doc)
+
+    def order(self, field):
+        """The doc numbers of every contact in order of field, built on first use"""
+        order = self.orders.get(field)
+        if order is None:
+            live = (doc for doc, contact in enumerate(self.search_index.docs)
+                    if contact is not None)
+            order = self.orders[field] = array('I', sorted(live, key=self.key(field)))
+        return order
+
+    def add(self, contact):
+        """Place a contact the search index has just added"""
+        doc = self.search_index.doc_of[contact.id]
+        for field, order in self.orders.items():
+            insort(order, doc, key=self.key(field))
+
+    def remove(self, contact):
+        """Take out a contact before the search index drops or replaces it"""
+        doc = self.search_index.doc_of[contact.id]
+        for field, order in self.orders.items():
+            del order[bisect_left(order, (contact[field].casefold(), doc), key=self.key(field))]
+
+    def sort(self, contacts, sort):
+        """Return contacts, all of them indexed, ordered as sort_contacts would
+
+        The first field's order is walked for the matching contacts, and
+        only runs of equal values are sorted by the other fields. When few
+        contacts matched it is cheaper to sort them directly.
+        """
+        doc_of = self.search_index.doc_of
+        if len(contacts) <= len(doc_of) // 8:
+            return sort_contacts(contacts, sort)
+        field, descending = sort[0]
+        order = self.order(field)
+        docs = self.search_index.docs
+        if len(contacts) == len(order):
+            result = [docs[doc] for doc in order]
+        else:
+            wanted = {doc_of[contact.id] for contact in contacts}
+            result = [docs[doc] for doc in order if doc in wanted]
+        if descending:
+            result.reverse()
+        if len(sort) > 1:
+            result = self.break_ties(result, field, sort[1:])
+        return result
+
+    @staticmethod
+    def break_ties(contacts, field, sort):
+        """Stably sort each run of contacts with equal field values by sort"""
+        result = []
+        for _, run in groupby(contacts, key=lambda contact: contact[field].casefold()):
+            run = list(run)
+            if len(run) > 1:
+                for tie_field, descending in reversed(sort):
+                    run.sort(key=lambda contact: contact[tie_field].casefold(), reverse=descending)
+            result.extend(run)
+        return result
+
+
+NON_DIGIT_RE = re.compile(r'\D')
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to its digits so formatting doesn't matter"""
+    return NON_DIGIT_RE.sub('', phone)
+
+
+class ContactKeyIndex:
+    """Case-folded hash indexes over the fields that must stay unique"""
+
+    FIELD_LABELS = {'name': 'name', 'phone': 'phone number', 'email': 'email address'}
+
+    def __init__(self):
+        # field -> normalized value -> id of the contact holding it, or a
+        # set of ids in the rare case several do (older, pre-check data)
+        self.keys = {field: {} for field in self.FIELD_LABELS}
+
+    @staticmethod
+    def normalize(name, phone, email):
+        """Return the lookup key for each unique field"""
+        return {'name': name.casefold(),
+                'phone': normalize_phone(phone),
+                'email': email.casefold()}
+
+    def build(self, contacts):
+        """Index every contact from scratch"""
+        for index in self.keys.values():
+            index.clear()
+        for contact in contacts:
+            self.add(contact)
+
+    def add(self, contact):
+        """Register a contact's unique fields"""
+        contact_id = contact['id']
+        keys = self.normalize(contact['name'], contact['phone'], contact['email'])
+        for field, key in keys.items():
+            if not key:
+                continue
+            index = self.keys[field]
+            owners = index.get(key)
+            if owners is None:
+                index[key] = contact_id
+            elif isinstance(owners, set):
+                owners.add(contact_id)
+            elif owners != contact_id:
+                index[key] = {owners, contact_id}
+
+    def remove(self, contact):
+        """Forget a contact's unique fields"""
+        contact_id = contact['id']
+        keys = self.normalize(contact['name'], contact['phone'], contact['email'])
+        for field, key in keys.items():
+            index = self.keys[field]
+            owners = index.get(key)
+            if owners is None:
+                continue
+            if isinstance(owners, set):
+                owners.discard(contact_id)
+                if len(owners) == 1:
+                    index[key] = owners.pop()
+            elif owners == contact_id:
+                del index[key]
+
+    def replace(self, old_contact, new_contact):
+        """Re-index an edited contact"""
+        self.remove(old_contact)
+        self.add(new_contact)
+
+    def find_duplicate(self, name, phone, email, exclude_id=None, exclude_ids=()):
+        """Return the first field another contact already uses, or None
+
+        Contacts exclude_id and exclude_ids don't count as another contact.
+        """
+        excluded = {exclude_id, *exclude_ids}
+        keys = self.normalize(name, phone, email)
+        for field, key in keys.items():
+            owners = self.keys[field].get(key) if key else None
+            if owners is None:
+                continue
+            if not isinstance(owners, set):
+                owners = (owners,)
+            if any(owner not in excluded for owner in owners):
+                return field
+        return None
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the items of the JSON array in text file f one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    at_end = False
+    state = 'start'  # then 'first' after '[', 'item' after ',', 'next' after an item
+
+    while True:
+        # Skip whitespace, reading more of the file as needed
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position < len(buffer) or at_end:
+                break
+            chunk = f.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            at_end = not chunk
+        if position >= len(buffer):
+            raise ValueError("Contacts file ends before its list does")
+
+        char = buffer[position]
+        if state == 'start':
+            if char != '[':
+                raise ValueError("Contacts file must hold a JSON list")
+            position += 1
+            state = 'first'
+        elif char == ']' and state in ('first', 'next'):
+            return
+        elif state == 'next':
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in contacts file, found {char!r}")
+            position += 1
+            state = 'item'
+        else:
+            # An item; if it runs past the buffer, read on and try again
+            while True:
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                    break
+                except json.JSONDecodeError:
+                    if at_end:
+                        raise
+                    chunk = f.read(chunk_size)
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    at_end = not chunk
+            yield item
+            state = 'next'
+
+
+def atomic_write_json(path, data):
+    """Write data as JSON to path via a temp file and rename"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        # default=dict writes ContactRecords as plain objects
+        json.dump(data, f, indent=2, default=dict)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class FileLock:
+    """Exclusive lock on a file, shared by every process using the contacts
+
+    Re-entrant, and threads of one process take turns holding it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; with blocking False, return False if it is held elsewhere"""
+        if not self.thread_lock.acquire(blocking):
+            return False
+        if self.depth == 0:
+            if self.file is None:
+                self.file = open(self.path, 'a+b')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(),
+                                fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(),
+                                   msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            except OSError:
+                self.thread_lock.release()
+                if blocking:
+                    raise
+                return False
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def close(self):
+        with self.thread_lock:
+            if self.file is not None and self.depth == 0:
+                self.file.close()
+                self.file = None
+
+
+class ContactChanges:
+    """Contacts that other processes added, changed or removed"""
+
+    def __init__(self):
+        self.changed = {}      # contact id -> contact as now stored
+        self.removed = set()   # contact ids
+        self.reloaded = False  # too far behind to say; everything may differ
+
+    def __bool__(self):
+        return bool(self.changed or self.removed or self.reloaded)
+
+    def change(self, contact):
+        self.changed[contact['id']] = contact
+        self.removed.discard(contact['id'])
+
+    def remove(self, contact_id):
+        self.changed.pop(contact_id, None)
+        self.removed.add(contact_id)
+
+
+class JournalStorage:
+    """Contacts snapshot plus an append-only journal, shareable between processes
+
+    The snapshot is the same JSON list contacts.json has always held. Each
+    add, update or delete is appended to <file>.journal as one JSON line,
+    and once the journal is long enough it is folded into a new snapshot
+    on a background thread.
+
+    Several processes may use the same file. Writes happen under a
+    FileLock, and each process follows the journal from the offset it has
+    read up to, so it only ever applies what the others appended. A
+    compaction leaves the journal it folded behind as <file>.journal.prev
+    so processes still reading it can finish.
+    """
+
+    COMPACT_AFTER = 500  # journal records before a compaction is started
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        # Journal being folded by a running compaction, then the one it folded
+        self.compacting_path = path + ".journal.old"
+        self.previous_path = path + ".journal.prev"
+        self.file_lock = FileLock(path + ".lock")
+        # Held for the whole of a compaction, so a leftover .old can be told apart
+        self.compact_lock = FileLock(path + ".compact.lock")
+        self.journal_tag = None   # header id of the journal being followed
+        self.journal_offset = 0   # bytes of it applied to this process's contacts
+        self.journal_records = 0
+        self.compactor = None
+        self.interrupted = False
+
+    def load(self):
+        """Yield the snapshot's contacts with both journals applied, in order
+
+        The journals are small and read first; the snapshot is then parsed
+        one contact at a time, so a large file never has to be held whole.
+        Afterwards, interrupted is True if a compaction died before
+        replacing the snapshot and a full save should finish it.
+        """
+        changes = {}  # contact id -> journaled contact, or None if deleted
+        with self.file_lock:
+            self.interrupted = False
+            if os.path.exists(self.compacting_path):
+                # Another process may be compacting right now; if so it holds the lock
+                if self.compact_lock.acquire(blocking=False):
+                    self.compact_lock.release()
+                    self.interrupted = True
+                self.replay(self.read_records(self.compacting_path, 0)[0], changes)
+            if self.read_tag(self.journal_path) is None:
+                # Missing, or written before journals had a header
+                self.start_journal(keep_records=True)
+            records, self.journal_offset = self.read_records(self.journal_path, 0)
+            self.replay(records, changes)
+            self.journal_records = len(records)
+            self.journal_tag = self.read_tag(self.journal_path)
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for contact in iter_json_array(f):
+                    contact_id = contact.get('id')
+                    if contact_id in changes:
+                        contact = changes.pop(contact_id)
+                        if contact is None:
+                            continue
+                    yield contact
+        # Whatever is left was added after the snapshot
+        for contact in changes.values():
+            if contact is not None:
+                yield contact
+
+    @staticmethod
+    def replay(records, changes):
+        """Collect journal records into changes: contact id -> contact, or None if deleted"""
+        for record in records:
+            if record['op'] == 'delete':
+                changes[record['id']] = None
+            else:
+                changes[record['contact']['id']] = record['contact']
+
+    def read_records(self, path, offset):
+        """Return the journal records in path after offset, and the offset they end at
+
+        Must be called holding file_lock, since a partial last line can then
+        only be a torn write from a crash; it is cut off.
+        """
+        records = []
+        good_size = offset
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return records, offset
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get('op') == 'batch':
+                    records.extend(record['records'])
+                elif 'op' in record:  # not the header
+                    records.append(record)
+                good_size += len(line)
+        if good_size != os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_size)
+        return records, good_size
+
+    @staticmethod
+    def read_tag(path):
+        """The id in a journal's header line, or None if it has none or is missing
+
+        File names and inode numbers get reused as journals are compacted
+        away, so the header is what tells one journal from the next.
+        """
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        return header.get('journal') if isinstance(header, dict) else None
+
+    def start_journal(self, keep_records=False):
+        """Replace the journal with a fresh header, plus its old records if asked
+
+        Must be called holding file_lock.
+        """
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write((json.dumps({'journal': uuid.uuid4().hex}) + "\n").encode('utf-8'))
+            if keep_records and os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as journal:
+                    shutil.copyfileobj(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def has_news(self):
+        """Cheap check, without the lock, for records this process hasn't read"""
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            return True
+        return size != self.journal_offset or self.read_tag(self.journal_path) != self.journal_tag
+
+    def read_new(self):
+        """Return records other processes appended since the last call, in order
+
+        Returns None if this process fell more than a compaction behind and
+        has to reload everything. Must be called holding file_lock.
+        """
+        # Oldest first: the journal the last compaction folded, the one being
+        # folded now (if any) and the live one; each was started by the one before
+        paths = [self.previous_path, self.compacting_path, self.journal_path]
+        tags = [self.read_tag(path) for path in paths]
+        if tags[-1] is None:
+            self.start_journal()
+            tags[-1] = self.read_tag(self.journal_path)
+        if self.journal_tag not in tags:
+            return None
+
+        records = []
+        first = tags.index(self.journal_tag)
+        for path, tag in zip(paths[first:], tags[first:]):
+            if tag is None:
+                continue
+            if tag != self.journal_tag:
+                # Finished the journal before this one; carry on from the top
+                self.journal_tag = tag
+                self.journal_offset = 0
+                self.journal_records = 0
+            new_records, self.journal_offset = self.read_records(path, self.journal_offset)
+            records.extend(new_records)
+            self.journal_records += len(new_records)
+        return records
+
+    def append(self, op, contact):
+        """Durably record one add, update or delete"""
+        self.append_many([(op, contact)])
+
+    def append_many(self, operations, atomic=False):
+        """Durably record a batch of (op, contact) pairs with one write and fsync
+
+        With atomic, the batch is one 'batch' line, so a crash part way
+        through the write leaves none of it rather than a prefix. The
+        caller must hold file_lock and have read every record the other
+        processes wrote, so the journal ends where this process's view does.
+        """
+        records = []
+        for op, contact in operations:
+            if op == 'delete':
+                records.append({'op': op, 'id': contact['id']})
+            else:
+                records.append({'op': op, 'contact': contact})
+        if not records:
+            return
+        count = len(records)
+        if atomic:
+            records = [{'op': 'batch', 'records': records}]
+        lines = [json.dumps(record, default=dict) + "\n" for record in records]
+        data = "".join(lines).encode('utf-8')
+        with self.file_lock:
+            with open(self.journal_path, 'ab') as journal:
+                journal.write(data)
+                journal.flush()
+                os.fsync(journal.fileno())
+            self.journal_offset += len(data)
+            self.journal_records += count
+
+    def needs_compaction(self):
+        """True when the journal is long and no compaction is running"""
+        return (self.journal_records >= self.COMPACT_AFTER
+                and (self.compactor is None or not self.compactor.is_alive())
+                and not os.path.exists(self.compacting_path)
+                and self.read_tag(self.journal_path) == self.journal_tag)
+
+    def compact_async(self, contacts):
+        """Fold the journal into a new snapshot of contacts on a worker thread
+
+        contacts must be this process's state, which covers the journal up
+        to journal_offset.
+        """
+        self.compactor = threading.Thread(
+            target=self.compact, args=(contacts, self.journal_tag, self.journal_offset),
+            daemon=True)
+        self.compactor.start()
+
+    def compact(self, contacts, journal_tag, journal_offset):
+        """Replace the snapshot with contacts plus any records after journal_offset
+
+        The journal is moved aside to .old and a fresh one started, so other
+        processes keep appending while the snapshot is written; the old
+        journal then becomes .prev. An .old left by an interrupted
+        compaction is kept and the journal's records added to it. Returns
+        False if another process got there first.
+        """
+        with self.compact_lock:
+            with self.file_lock:
+                if self.read_tag(self.journal_path) != journal_tag or (
+                        os.path.exists(self.compacting_path) and not self.interrupted):
+                    return False
+                # Records other processes appended since this process's view
+                records = self.read_records(self.journal_path, journal_offset)[0]
+                if os.path.exists(self.compacting_path):
+                    # An interrupted compaction's journal was never folded in;
+                    # add this one's records after it instead of replacing it
+                    with open(self.journal_path, 'rb') as journal, \
+                            open(self.compacting_path, 'ab') as compacting:
+                        journal.readline()  # the header
+                        shutil.copyfileobj(journal, compacting)
+                        compacting.flush()
+                        os.fsync(compacting.fileno())
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+                self.start_journal()
+
+            latest = {contact['id']: contact for contact in contacts}
+            for record in records:
+                if record['op'] == 'delete':
+                    latest.pop(record['id'], None)
+                else:
+                    latest[record['contact']['id']] = record['contact']
+            try:
+                atomic_write_json(self.path, list(latest.values()))
+            except OSError as e:
+                # The old journal is kept and replayed on the next start
+                print(f"Error compacting contacts: {e}")
+                return False
+
+            with self.file_lock:
+                os.replace(self.compacting_path, self.previous_path)
+                self.interrupted = False
+            return True
+
+    def save_all(self, contacts):
+        """Synchronously write a full snapshot of contacts, this process's current state"""
+        self.wait()
+        self.compact(contacts, self.journal_tag, self.journal_offset)
+
+    def wait(self):
+        """Block until a running compaction has finished"""
+        if self.compactor is not None:
+            self.compactor.join()
+
+    def close(self):
+        """Finish background work and release the lock files"""
+        self.wait()
+        self.file_lock.close()
+        self.compact_lock.close()
+
+
+class JsonContactBackend:
+    """Contacts held in memory, indexed, and persisted through JournalStorage
+
+    Every backend offers the same interface to the UI: load, len, get,
+    count/page for paginated, optionally sorted search, find_duplicate,
+    add/update/delete and their batch forms (which persist immediately),
+    locked/sync for sharing the file with other processes, and close.
+    """
+
+    LOAD_BATCH = 2000  # contacts indexed per lock hold while loading
+
+    def __init__(self, path):
+        self.storage = JournalStorage(path)
+        self.contacts = {}  # contact id -> ContactRecord, in insertion order
+        self.search_index = ContactSearchIndex()
+        self.sort_index = ContactSortIndex(self.search_index)
+        self.key_index = ContactKeyIndex()
+        self.result_term = None
+        self.result = None  # matches for result_term (term and sort), reused while paging
+        self.changes = ContactChanges()  # other processes' changes not yet taken
+        # Searches run on a worker thread while edits happen on the UI thread
+        self.lock = threading.RLock()
+
+    def load(self, progress=None, cancelled=None):
+        """Stream the snapshot and journal into the indexes
+
+        Contacts become searchable a batch at a time, and progress(batch),
+        if given, is called after each one. Loading stops early once
+        cancelled() returns True; nothing is written back in that case.
+        """
+        if self.read_files(progress, cancelled):
+            # Also finishes a compaction that died before replacing the snapshot
+            with self.lock:
+                contacts = list(self.contacts.values())
+            self.storage.save_all(contacts)
+
+    def read_files(self, progress=None, cancelled=None):
+        """Index everything the files hold; returns True if a full save should follow"""
+        missing_ids = False
+        batch = []
+        for contact in self.storage.load():
+            # Contacts saved before ids existed get one now
+            if 'id' not in contact:
+                contact['id'] = uuid.uuid4().hex
+                missing_ids = True
+            batch.append(ContactRecord.from_dict(contact))
+            if len(batch) == self.LOAD_BATCH:
+                if cancelled is not None and cancelled():
+                    return False
+                self.index_many(batch)
+                if progress:
+                    progress(batch)
+                batch = []
+        if batch:
+            self.index_many(batch)
+            if progress:
+                progress(batch)
+        return missing_ids or self.storage.interrupted
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def get(self, contact_id):
+        """Return the contact with this id, or None"""
+        return self.contacts.get(contact_id)
+
+    def matches(self, search_term, cancelled=None, sort=()):
+        """Return every contact matching search_term in sort order, cached per term and sort"""
+        result_term = (search_term.casefold(), sort)
+        with self.lock:
+            if self.result is None or result_term != self.result_term:
+                result = self.search_index.search(result_term[0], cancelled)
+                if sort:
+                    result = self.sort_index.sort(result, sort)
+                self.result = result
+                self.result_term = result_term
+            return self.result
+
+    def count(self, search_term, cancelled=None, sort=()):
+        """Number of contacts matching search_term
+
+        Also sorts them, so that paging through the result is just slicing.
+        """
+        return len(self.matches(search_term, cancelled, sort))
+
+    def page(self, search_term, offset, limit, sort=()):
+        """Matching contacts offset..offset+limit, in list order unless sorted"""
+        return self.matches(search_term, sort=sort)[offset:offset + limit]
+
+    def position(self, search_term, contact_id, sort=()):
+        """Index of a contact among the matches in sort order, or None"""
+        return next((index for index, contact in enumerate(self.matches(search_term, sort=sort))
+                     if contact['id'] == contact_id), None)
+
+    def iter_contacts(self, search_term=''):
+        """Yield the contacts matching search_term in list order"""
+        yield from self.matches(search_term)
+
+    def find_duplicate(self, name, phone, email, exclude_id=None, exclude_ids=()):
+        """Return the first unique field another contact already uses, or None"""
+        with self.lock:
+            return self.key_index.find_duplicate(name, phone, email, exclude_id, exclude_ids)
+
+    @contextmanager
+    def locked(self):
+        """Hold the file lock, with every other process's changes applied
+
+        Checks and writes made inside cannot race another process's.
+        """
+        with self.storage.file_lock:
+            self.catch_up()
+            yield self
+
+    def sync(self):
+        """Apply other processes' changes and return them as ContactChanges"""
+        if self.storage.has_news():
+            with self.storage.file_lock:
+                self.catch_up()
+        with self.lock:
+            changes, self.changes = self.changes, ContactChanges()
+        return changes
+
+    def catch_up(self):
+        """Apply journal records other processes appended; call holding the file lock"""
+        records = self.storage.read_new()
+        with self.lock:
+            if records is None:
+                # More than a compaction behind: start over from the files
+                self.contacts.clear()
+                self.search_index.build(())
+                self.sort_index.clear()
+                self.key_index.build(())
+                # No save here: it would wait on a compaction while holding the file lock
+                self.read_files()
+                self.changes.reloaded = True
+                self.result = None
+                return
+            for record in records:
+                if record['op'] == 'delete':
+                    self.forget(record['id'])
+                    self.changes.remove(record['id'])
+                else:
+                    contact = ContactRecord.from_dict(record['contact'])
+                    self.remember(contact)
+                    self.changes.change(contact)
+            if records:
+                self.result = None
+
+    def remember(self, contact):
+        """Index a contact, replacing any earlier version of it"""
+        original_contact = self.contacts.get(contact.id)
+        self.contacts[contact.id] = contact
+        if original_contact is None:
+            self.search_index.add(contact)
+            self.sort_index.add(contact)
+            self.key_index.add(contact)
+        else:
+            self.sort_index.remove(original_contact)
+            self.search_index.replace(original_contact, contact)
+            self.sort_index.add(contact)
+            self.key_index.replace(original_contact, contact)
+
+    def forget(self, contact_id):
+        """Drop a contact from the indexes; returns whether it was there"""
+        original_contact = self.contacts.pop(contact_id, None)
+        if original_contact is None:
+            return False
+        self.sort_index.remove(original_contact)
+        self.search_index.remove(original_contact)
+        self.key_index.remove(original_contact)
+        return True
+
+    def index_many(self, contacts):
+        """Index a batch of contacts read from the files"""
+        with self.lock:
+            for contact in contacts:
+                self.remember(contact)
+            self.result = None
+
+    def add(self, contact):
+        """Persist and index a new contact"""
+        self.add_many([contact])
+
+    def add_many(self, contacts):
+        """Persist and index a batch of new contacts with a single fsync"""
+        contacts = [ContactRecord.from_dict(contact) for contact in contacts]
+        with self.locked(), self.lock:
+            self.storage.append_many([('add', contact) for contact in contacts])
+            for contact in contacts:
+                self.remember(contact)
+            self.changed()
+
+    def delete_many(self, contact_ids):
+        """Persist the removal of a batch of contacts; returns how many existed"""
+        with self.locked(), self.lock:
+            contacts = [self.contacts[contact_id] for contact_id in dict.fromkeys(contact_ids)
+                        if contact_id in self.contacts]
+            self.storage.append_many([('delete', contact) for contact in contacts])
+            for contact in contacts:
+                self.forget(contact.id)
+            self.changed()
+        return len(contacts)
+
+    def merge_many(self, contacts, contact_ids):
+        """Atomically rewrite contacts and remove contact_ids, e.g. to merge duplicates"""
+        contacts = [ContactRecord.from_dict(contact) for contact in contacts]
+        with self.locked(), self.lock:
+            removed = [self.contacts[contact_id] for contact_id in dict.fromkeys(contact_ids)
+                       if contact_id in self.contacts]
+            self.storage.append_many([('delete', contact) for contact in removed]
+                                     + [('update', contact) for contact in contacts],
+                                     atomic=True)
+            # Removed first, so their unique keys are free for the merged contacts
+            for contact in removed:
+                self.forget(contact.id)
+            for contact in contacts:
+                self.remember(contact)
+            self.changed()
+
+    @contextmanager
+    def bulk(self):
+        """Group add_many/delete_many batches; each batch is already durable"""
+        yield self
+
+    def update(self, contact):
+        """Persist and re-index an edited contact, keeping its position"""
+        contact = ContactRecord.from_dict(contact)
+        with self.locked(), self.lock:
+            self.storage.append('update', contact)
+            self.remember(contact)
+            self.changed()
+
+    def delete(self, contact_id):
+        """Persist the removal of a contact and drop it from the indexes"""
+        self.delete_many([contact_id])
+
+    def changed(self):
+        """Invalidate cached results and compact the journal when due"""
+        self.result = None
+        if self.storage.needs_compaction():
+            self.storage.compact_async(list(self.contacts.values()))
+
+    def close(self):
+        """Finish pending writes"""
+        self.storage.close()
+
+
+class SQLiteContactBackend:
+    """Contacts kept in SQLite, with search and paging done by the database
+
+    Unique-field keys are stored normalized in indexed columns, and an FTS5
+    trigram table over casefolded copies of all four fields answers
+    substring searches, so the UI only ever holds the page it is showing.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS contacts (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT NOT NULL,
+            address TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            phone_key TEXT NOT NULL,
+            email_key TEXT NOT NULL,
+            name_fold TEXT NOT NULL DEFAULT '',
+            phone_fold TEXT NOT NULL DEFAULT '',
+            email_fold TEXT NOT NULL DEFAULT '',
+            address_fold TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS contacts_name_key ON contacts(name_key);
+        CREATE INDEX IF NOT EXISTS contacts_phone_key ON contacts(phone_key);
+        CREATE INDEX IF NOT EXISTS contacts_email_key ON contacts(email_key);
+        -- Sorted paging reads these in order instead of sorting every match.
+        -- They replace indexes on COLLATE NOCASE, which only folds ASCII.
+        DROP INDEX IF EXISTS contacts_name_order;
+        DROP INDEX IF EXISTS contacts_phone_order;
+        DROP INDEX IF EXISTS contacts_email_order;
+        DROP INDEX IF EXISTS contacts_address_order;
+        CREATE INDEX IF NOT EXISTS contacts_name_fold_order ON contacts(name_fold, seq);
+        CREATE INDEX IF NOT EXISTS contacts_phone_fold_order ON contacts(phone_fold, seq);
+        CREATE INDEX IF NOT EXISTS contacts_email_fold_order ON contacts(email_fold, seq);
+        CREATE INDEX IF NOT EXISTS contacts_address_fold_order ON contacts(address_fold, seq);
+
+        -- Ids touched by each write, so other processes can pick up just those
+        CREATE TABLE IF NOT EXISTS contact_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS contacts_log_insert AFTER INSERT ON contacts BEGIN
+            INSERT INTO contact_changes (id) VALUES (new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_log_update AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contact_changes (id) VALUES (new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_log_delete AFTER DELETE ON contacts BEGIN
+            INSERT INTO contact_changes (id) VALUES (old.id);
+        END;
+    """
+
+    # The trigram index is over the casefolded columns and itself case
+    # sensitive, so it matches exactly what the JSON backend's search does
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+            name_fold, phone_fold, email_fold, address_fold,
+            content='contacts', content_rowid='seq', tokenize='trigram case_sensitive 1'
+        );
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, name_fold, phone_fold, email_fold, address_fold)
+            VALUES (new.seq, new.name_fold, new.phone_fold, new.email_fold, new.address_fold);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name_fold, phone_fold, email_fold,
+                                     address_fold)
+            VALUES ('delete', old.seq, old.name_fold, old.phone_fold, old.email_fold,
+                    old.address_fold);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name_fold, phone_fold, email_fold,
+                                     address_fold)
+            VALUES ('delete', old.seq, old.name_fold, old.phone_fold, old.email_fold,
+                    old.address_fold);
+            INSERT INTO contacts_fts(rowid, name_fold, phone_fold, email_fold, address_fold)
+            VALUES (new.seq, new.name_fold, new.phone_fold, new.email_fold, new.address_fold);
+        END;
+    """
+
+    # Databases made before the *_fold columns: the old trigram index read
+    # the raw fields and folded case the way SQLite does
+    FOLD_MIGRATION = """
+        DROP TRIGGER IF EXISTS contacts_fts_insert;
+        DROP TRIGGER IF EXISTS contacts_fts_delete;
+        DROP TRIGGER IF EXISTS contacts_fts_update;
+        DROP TABLE IF EXISTS contacts_fts;
+        ALTER TABLE contacts ADD COLUMN name_fold TEXT NOT NULL DEFAULT '';
+        ALTER TABLE contacts ADD COLUMN phone_fold TEXT NOT NULL DEFAULT '';
+        ALTER TABLE contacts ADD COLUMN email_fold TEXT NOT NULL DEFAULT '';
+        ALTER TABLE contacts ADD COLUMN address_fold TEXT NOT NULL DEFAULT '';
+        UPDATE contacts SET name_fold = casefold(name), phone_fold = casefold(phone),
+                            email_fold = casefold(email), address_fold = casefold(address);
+    """
+
+    COLUMNS = "id, name, phone, email, address"
+    # Change log rows kept; a process further behind than this rereads everything
+    CHANGE_LOG_KEEP = 10000
+    INSERT = ("INSERT INTO contacts (name, phone, email, address, "
+              "name_key, phone_key, email_key, "
+              "name_fold, phone_fold, email_fold, address_fold, id) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    UPDATE = ("UPDATE contacts SET name = ?, phone = ?, email = ?, address = ?, "
+              "name_key = ?, phone_key = ?, email_key = ?, "
+              "name_fold = ?, phone_fold = ?, email_fold = ?, address_fold = ? WHERE id = ?")
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.connections = []
+        self.has_fts = False
+        self.total = 0
+        # Serializes check-then-write sequences with other processes
+        self.file_lock = FileLock(path + ".lock")
+        self.change_seq = 0  # last change log entry applied
+        self.changes = ContactChanges()  # other processes' changes not yet taken
+
+    @property
+    def db(self):
+        """This thread's connection; WAL lets searches read while the UI writes"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.create_function("casefold", 1, str.casefold, deterministic=True)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+            self.connections.append(db)
+        return db
+
+    def load(self, progress=None, cancelled=None):
+        """Open the database, creating the schema on first use
+
+        Nothing is read up front, so there is no progress to report.
+        """
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.file_lock:
+            columns = {row['name'] for row in self.db.execute("PRAGMA table_info(contacts)")}
+            migrate = bool(columns) and 'name_fold' not in columns
+            if migrate:
+                self.db.executescript("BEGIN;" + self.FOLD_MIGRATION + "COMMIT;")
+            with self.db:
+                self.db.executescript(self.SCHEMA)
+        try:
+            with self.file_lock, self.db:
+                self.db.executescript(self.FTS_SCHEMA)
+                if migrate:
+                    self.db.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # No FTS5 or no trigram tokenizer in this SQLite build
+            self.has_fts = False
+        with self.db:
+            self.db.execute("DELETE FROM contact_changes WHERE seq <= "
+                            "(SELECT max(seq) FROM contact_changes) - ?", (self.CHANGE_LOG_KEEP,))
+        self.change_seq = self.latest_change()
+        self.total = self.db.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def __len__(self):
+        return self.total
+
+    def latest_change(self):
+        return self.db.execute("SELECT max(seq) FROM contact_changes").fetchone()[0] or 0
+
+    @contextmanager
+    def locked(self):
+        """Hold the file lock, with every other process's changes applied
+
+        Checks and writes made inside cannot race another process's.
+        """
+        with self.file_lock:
+            self.catch_up()
+            try:
+                yield self
+            finally:
+                # Everything logged while we held the lock was our own doing
+                self.change_seq = self.latest_change()
+
+    def sync(self):
+        """Apply other processes' changes and return them as ContactChanges"""
+        with self.file_lock:
+            if self.latest_change() != self.change_seq:
+                self.catch_up()
+            changes, self.changes = self.changes, ContactChanges()
+        return changes
+
+    def catch_up(self):
+        """Note contacts other processes wrote since change_seq; call holding the file lock"""
+        db = self.db
+        latest = self.latest_change()
+        if latest == self.change_seq:
+            return
+        oldest = db.execute("SELECT min(seq) FROM contact_changes").fetchone()[0]
+        ids = {row[0] for row in db.execute(
+            "SELECT id FROM contact_changes WHERE seq > ? AND seq <= ?",
+            (self.change_seq, latest))}
+        if oldest is None or oldest > self.change_seq + 1 or len(ids) > self.CHANGE_LOG_KEEP:
+            # The log no longer reaches back far enough, or the change is huge
+            self.changes.reloaded = True
+        else:
+            rows = db.execute(
+                f"SELECT {self.COLUMNS} FROM contacts WHERE id IN "
+                "(SELECT id FROM contact_changes WHERE seq > ? AND seq <= ?)",
+                (self.change_seq, latest))
+            for row in rows:
+                contact = self.to_contact(row)
+                self.changes.change(contact)
+                ids.discard(contact['id'])
+            for contact_id in ids:
+                self.changes.remove(contact_id)
+        self.change_seq = latest
+        self.total = db.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    @staticmethod
+    def to_contact(row):
+        return {'id': row['id'], 'name': row['name'], 'phone': row['phone'],
+                'email': row['email'], 'address': row['address']}
+
+    def get(self, contact_id):
+        """Return the contact with this id, or None"""
+        row = self.db.execute(f"SELECT {self.COLUMNS} FROM contacts WHERE id = ?",
+                              (contact_id,)).fetchone()
+        return self.to_contact(row) if row else None
+
+    def where(self, search_term):
+        """SQL filter and parameters for a search term"""
+        if not search_term:
+            return "", ()
+        # Substrings of the casefolded fields, the same test the JSON backend makes
+        search_term = search_term.casefold()
+        if self.has_fts and len(search_term) >= 3:
+            # Trigram phrase queries are substring matches
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            return ("WHERE seq IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?)",
+                    (phrase,))
+        return ("WHERE instr(name_fold, ?) OR instr(phone_fold, ?) "
+                "OR instr(email_fold, ?) OR instr(address_fold, ?)",
+                (search_term,) * 4)
+
+    def count(self, search_term, cancelled=None, sort=()):
+        """Number of contacts matching search_term; the database sorts while paging"""
+        if not search_term:
+            return self.total
+        where, params = self.where(search_term)
+        db = self.db
+        if cancelled is not None:
+            # SQLite aborts the statement when the handler returns true
+            db.set_progress_handler(cancelled, 10000)
+        try:
+            return db.execute(f"SELECT count(*) FROM contacts {where}", params).fetchone()[0]
+        except sqlite3.OperationalError:
+            if cancelled is not None and cancelled():
+                raise SearchCancelled()
+            raise
+        finally:
+            if cancelled is not None:
+                db.set_progress_handler(None, 0)
+
+    @staticmethod
+    def order_by(sort):
+        """ORDER BY clause matching sort_contacts, served by the *_fold_order indexes
+
+        The *_fold columns hold str.casefold() of each field, and SQLite
+        compares text by code point as Python does, so pages come out in
+        the same order on both backends.
+        """
+        if not sort:
+            return "ORDER BY seq"
+        terms = []
+        for field, descending in sort:
+            if field not in SORT_FIELDS:
+                raise ValueError(f"Cannot sort by {field!r}")
+            terms.append(f"{field}_fold DESC" if descending else f"{field}_fold")
+        terms.append("seq DESC" if sort[0][1] else "seq")
+        return "ORDER BY " + ", ".join(terms)
+
+    def page(self, search_term, offset, limit, sort=()):
+        """Matching contacts offset..offset+limit, in insertion order unless sorted"""
+        where, params = self.where(search_term)
+        rows = self.db.execute(
+            f"SELECT {self.COLUMNS} FROM contacts {where} {self.order_by(sort)} LIMIT ? OFFSET ?",
+            params + (limit, offset))
+        return [self.to_contact(row) for row in rows]
+
+    def position(self, search_term, contact_id, sort=()):
+        """Index of a contact among the matches in sort order, or None"""
+        where, params = self.where(search_term)
+        row = self.db.execute(
+            f"SELECT position FROM (SELECT id, row_number() OVER ({self.order_by(sort)}) - 1 "
+            f"AS position FROM contacts {where}) WHERE id = ?",
+            params + (contact_id,)).fetchone()
+        return row[0] if row else None
+
+    def iter_contacts(self, search_term=''):
+        """Yield the contacts matching search_term straight from a cursor"""
+        where, params = self.where(search_term)
+        for row in self.db.execute(f"SELECT {self.COLUMNS} FROM contacts {where} ORDER BY seq",
+                                   params):
+            yield self.to_contact(row)
+
+    def find_duplicate(self, name, phone, email, exclude_id=None, exclude_ids=()):
+        """Return the first unique field another contact already uses, or None"""
+        excluded = [contact_id for contact_id in {exclude_id, *exclude_ids} if contact_id is not None]
+        placeholders = ", ".join("?" * len(excluded))
+        keys = ContactKeyIndex.normalize(name, phone, email)
+        for field, key in keys.items():
+            if key and self.db.execute(
+                    f"SELECT 1 FROM contacts WHERE {field}_key = ? "
+                    f"AND id NOT IN ({placeholders}) LIMIT 1",
+                    (key, *excluded)).fetchone():
+                return field
+        return None
+
+    @staticmethod
+    def to_row(contact):
+        keys = ContactKeyIndex.normalize(contact['name'], contact['phone'], contact['email'])
+        return (contact['name'], contact['phone'], contact['email'], contact['address'],
+                keys['name'], keys['phone'], keys['email'],
+                contact['name'].casefold(), contact['phone'].casefold(),
+                contact['email'].casefold(), contact['address'].casefold(), contact['id'])
+
+    def add(self, contact):
+        """Insert a new contact"""
+        with self.locked(), self.db:
+            self.db.execute(self.INSERT, self.to_row(contact))
+        self.total += 1
+
+    def add_many(self, contacts):
+        """Insert a batch of new contacts in one transaction"""
+        with self.locked(), self.db:
+            self.db.executemany(self.INSERT, map(self.to_row, contacts))
+        self.total += len(contacts)
+
+    def delete_many(self, contact_ids):
+        """Delete a batch of contacts in one transaction; returns how many existed"""
+        with self.locked(), self.db:
+            deleted = self.db.executemany("DELETE FROM contacts WHERE id = ?",
+                                          ((contact_id,) for contact_id in contact_ids)).rowcount
+        self.total -= deleted
+        return deleted
+
+    def merge_many(self, contacts, contact_ids):
+        """Atomically rewrite contacts and remove contact_ids, e.g. to merge duplicates"""
+        with self.locked(), self.db:
+            deleted = self.db.executemany("DELETE FROM contacts WHERE id = ?",
+                                          ((contact_id,) for contact_id in contact_ids)).rowcount
+            self.db.executemany(self.UPDATE, map(self.to_row, contacts))
+        self.total -= deleted
+
+    @contextmanager
+    def bulk(self):
+        """Group add_many/delete_many batches
+
+        Each batch commits on its own, so other processes can write in between.
+        """
+        yield self
+
+    def update(self, contact):
+        """Rewrite an existing contact in place"""
+        with self.locked(), self.db:
+            self.db.execute(self.UPDATE, self.to_row(contact))
+
+    def delete(self, contact_id):
+        """Remove a contact"""
+        with self.locked(), self.db:
+            deleted = self.db.execute("DELETE FROM contacts WHERE id = ?",
+                                      (contact_id,)).rowcount
+        self.total -= deleted
+
+    def close(self):
+        """Close every connection opened on the database"""
+        for db in self.connections:
+            db.close()
+        self.connections = []
+        self.local = threading.local()
+        self.file_lock.close()
+
+
+def open_backend(path):
+    """Pick the storage backend from the file extension"""
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteContactBackend(path)
+    return JsonContactBackend(path)
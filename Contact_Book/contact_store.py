@@ -0,0 +1,333 @@
+import threading
+import uuid
+from itertools import islice
+
+import contact_export
+from contact_fuzzy import FuzzyNameIndex
+from contact_storage import ContactKeyIndex, open_backend, sort_contacts
+from contact_validators import validate_email, validate_emails, validate_phone, validate_phones
+
+FIELDS = ('name', 'phone', 'email', 'address')
+
+
+class ContactError(Exception):
+    """A contact change was rejected; title and message are meant for the user"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+class ImportReport:
+    """Running totals for a bulk add"""
+
+    MAX_ERRORS = 100  # rejected rows kept for the summary
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def reject(self, row_number, reason):
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f"Row {row_number}: {reason}")
+
+    def summary(self):
+        return (f"Imported {self.imported} of {self.rows} rows "
+                f"({self.duplicates} duplicates, {self.invalid} invalid)")
+
+
+class ContactStore:
+    """Contact book operations (validation, dedupe, search, persistence)
+
+    Pure Python on top of a storage backend, so it can run without Tk,
+    from the command line, a server or the benchmark suite.
+    """
+
+    BULK_CHUNK_SIZE = 5000
+
+    def __init__(self, backend):
+        self.backend = backend
+        # Built by the first fuzzy search, then kept in step with every change
+        self.fuzzy_index = None
+        self.fuzzy_term = None
+        self.fuzzy_result = None
+        self.fuzzy_lock = threading.RLock()
+
+    @classmethod
+    def open(cls, path):
+        """Open and load the contacts file at path"""
+        store = cls(open_backend(path))
+        store.load()
+        return store
+
+    def load(self, progress=None, cancelled=None):
+        """Load the contacts file
+
+        progress(batch), if given, is called as each batch of contacts
+        becomes searchable; loading stops early once cancelled() is True.
+        """
+        def loaded(batch):
+            self.fuzzy_changed(added=batch)
+            if progress:
+                progress(batch)
+
+        self.backend.load(loaded, cancelled)
+
+    def close(self):
+        self.backend.close()
+
+    def __len__(self):
+        return len(self.backend)
+
+    def get(self, contact_id):
+        """Return the contact with this id, or None"""
+        return self.backend.get(contact_id)
+
+    def count(self, search_term='', cancelled=None, fuzzy=False, sort=()):
+        """Number of contacts matching search_term
+
+        With fuzzy, names are matched allowing typos, prefixes and
+        sound-alikes instead of by substring. sort is a sequence of
+        (field, descending) pairs; passing the one page will use lets the
+        backend sort while counting.
+        """
+        if fuzzy and search_term.strip():
+            return len(self.fuzzy_matches(search_term, cancelled, sort))
+        return self.backend.count(search_term, cancelled, sort)
+
+    def page(self, search_term, offset, limit, fuzzy=False, sort=()):
+        """Matching contacts offset..offset+limit
+
+        In list order, or best first for fuzzy searches, unless sorted.
+        """
+        if fuzzy and search_term.strip():
+            contacts = (self.backend.get(contact_id) for contact_id
+                        in self.fuzzy_matches(search_term, sort=sort)[offset:offset + limit])
+            return [contact for contact in contacts if contact is not None]
+        return self.backend.page(search_term, offset, limit, sort)
+
+    def position(self, search_term, contact_id, fuzzy=False, sort=()):
+        """Index of a contact among the matches page() serves, or None if it isn't one"""
+        if fuzzy and search_term.strip():
+            try:
+                return self.fuzzy_matches(search_term, sort=sort).index(contact_id)
+            except ValueError:
+                return None
+        return self.backend.position(search_term, contact_id, sort)
+
+    def fuzzy_matches(self, search_term, cancelled=None, sort=()):
+        """Ids of the contacts fuzzily matching search_term, ranked and cached per term
+
+        With sort, the ranked matches are put in sort order instead.
+        """
+        with self.fuzzy_lock:
+            if self.fuzzy_index is None:
+                index = FuzzyNameIndex()
+                index.build(self.backend.iter_contacts())
+                self.fuzzy_index = index
+            if self.fuzzy_result is None or (search_term, sort) != self.fuzzy_term:
+                result = self.fuzzy_index.search(search_term, cancelled)
+                if sort:
+                    contacts = (self.backend.get(contact_id) for contact_id in result)
+                    result = [contact['id'] for contact in sort_contacts(
+                        (contact for contact in contacts if contact is not None), sort)]
+                self.fuzzy_result = result
+                self.fuzzy_term = (search_term, sort)
+            return self.fuzzy_result
+
+    def fuzzy_changed(self, added=(), removed=()):
+        """Apply a change to the fuzzy index, if it has been built"""
+        with self.fuzzy_lock:
+            self.fuzzy_result = None
+            if self.fuzzy_index is not None:
+                for contact_id in removed:
+                    self.fuzzy_index.remove(contact_id)
+                for contact in added:
+                    self.fuzzy_index.add(contact)
+
+    def search(self, search_term, limit=None):
+        """Return the matching contacts, or the first limit of them"""
+        if limit is None:
+            return list(self.backend.iter_contacts(search_term))
+        return self.backend.page(search_term, 0, limit)
+
+    def iter_contacts(self, search_term=''):
+        """Yield the matching contacts without materializing them all"""
+        return self.backend.iter_contacts(search_term)
+
+    @staticmethod
+    def clean(name, phone, email, address):
+        return {'name': name.strip(), 'phone': phone.strip(),
+                'email': email.strip(), 'address': address.strip()}
+
+    def validate(self, fields, exclude_id=None):
+        """Raise ContactError if fields are invalid or clash with another contact"""
+        if not fields['name']:
+            raise ContactError("Validation Error", "Name is required")
+
+        phone_valid, phone_msg = validate_phone(fields['phone'])
+        if not phone_valid:
+            raise ContactError("Phone Validation Error", phone_msg)
+
+        email_valid, email_msg = validate_email(fields['email'])
+        if not email_valid:
+            raise ContactError("Email Validation Error", email_msg)
+
+        duplicate = self.backend.find_duplicate(fields['name'], fields['phone'],
+                                                fields['email'], exclude_id)
+        if duplicate:
+            label = ContactKeyIndex.FIELD_LABELS[duplicate]
+            if exclude_id is None:
+                raise ContactError("Duplicate Contact", f"Contact with this {label} already exists")
+            raise ContactError("Duplicate Contact", f"Another contact with this {label} already exists")
+
+    def add(self, name, phone, email='', address=''):
+        """Validate, deduplicate and persist a new contact; returns it"""
+        fields = self.clean(name, phone, email, address)
+        with self.backend.locked():
+            self.validate(fields)
+            contact = {'id': uuid.uuid4().hex, **fields}
+            self.backend.add(contact)
+        self.fuzzy_changed(added=[contact])
+        return contact
+
+    def update(self, contact_id, name, phone, email='', address=''):
+        """Validate and persist new values for an existing contact; returns it"""
+        fields = self.clean(name, phone, email, address)
+        with self.backend.locked():
+            if self.backend.get(contact_id) is None:
+                raise ContactError("Selection Error", "This contact no longer exists")
+            self.validate(fields, exclude_id=contact_id)
+            contact = {'id': contact_id, **fields}
+            self.backend.update(contact)
+        self.fuzzy_changed(added=[contact], removed=[contact_id])
+        return contact
+
+    def delete(self, contact_id):
+        """Remove a contact"""
+        with self.backend.locked():
+            if self.backend.get(contact_id) is None:
+                raise ContactError("Selection Error", "This contact no longer exists")
+            self.backend.delete(contact_id)
+        self.fuzzy_changed(removed=[contact_id])
+
+    def bulk_add(self, rows, chunk_size=None, progress=None, cancelled=None):
+        """Add many contacts from an iterable of field dicts; returns an ImportReport
+
+        Rows are validated, deduplicated and written a chunk at a time, each
+        chunk with a single write, so other processes can interleave theirs.
+        progress(report) is called after each chunk, and the run stops
+        early once cancelled() returns True.
+        """
+        report = ImportReport()
+        rows = iter(rows)
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+
+        with self.backend.bulk():
+            while not (cancelled and cancelled()):
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+
+                fields = [{field: (row.get(field) or '').strip() for field in FIELDS}
+                          for row in chunk]
+                phone_results = validate_phones([row['phone'] for row in fields])
+                email_results = validate_emails([row['email'] for row in fields])
+
+                # Duplicate checks and the write happen together, so another
+                # process can't add the same contact in between
+                with self.backend.locked():
+                    # Catches duplicates inside the chunk before it reaches the backend
+                    chunk_keys = ContactKeyIndex()
+                    batch = []
+                    for row, (phone_valid, phone_msg), (email_valid, email_msg) in zip(
+                            fields, phone_results, email_results):
+                        report.rows += 1
+                        if not row['name']:
+                            report.invalid += 1
+                            report.reject(report.rows, "Name is required")
+                            continue
+                        if not phone_valid or not email_valid:
+                            report.invalid += 1
+                            report.reject(report.rows, phone_msg if not phone_valid else email_msg)
+                            continue
+
+                        duplicate = (self.backend.find_duplicate(row['name'], row['phone'], row['email'])
+                                     or chunk_keys.find_duplicate(row['name'], row['phone'], row['email']))
+                        if duplicate:
+                            report.duplicates += 1
+                            report.reject(report.rows,
+                                          f"Duplicate {ContactKeyIndex.FIELD_LABELS[duplicate]}")
+                            continue
+
+                        contact = {'id': uuid.uuid4().hex, **row}
+                        chunk_keys.add(contact)
+                        batch.append(contact)
+
+                    self.backend.add_many(batch)
+                self.fuzzy_changed(added=batch)
+                report.imported += len(batch)
+                if progress:
+                    progress(report)
+
+        return report
+
+    def bulk_delete(self, contact_ids):
+        """Remove many contacts with a single write; returns how many existed"""
+        contact_ids = list(contact_ids)
+        with self.backend.bulk():
+            deleted = self.backend.delete_many(contact_ids)
+        self.fuzzy_changed(removed=contact_ids)
+        return deleted
+
+    def merge(self, merges):
+        """Apply (merged contact, ids folded into it, group) merges in one transaction
+
+        Merges come from contact_dedupe. One is skipped if any contact of
+        its group was edited or deleted since it was planned, or if the
+        merged contact would clash with a contact outside the group;
+        returns how many were applied.
+        """
+        updated = []
+        removed = []
+        with self.backend.locked():
+            for merged, contact_ids, group in merges:
+                if not all(self.unchanged(contact) for contact in group):
+                    continue
+                if self.backend.find_duplicate(merged['name'], merged['phone'], merged['email'],
+                                               exclude_ids=[contact['id'] for contact in group]):
+                    continue
+                updated.append(merged)
+                removed.extend(contact_ids)
+            self.backend.merge_many(updated, removed)
+        self.fuzzy_changed(added=updated,
+                           removed=removed + [contact['id'] for contact in updated])
+        return len(updated)
+
+    def unchanged(self, contact):
+        """True if contact still exists with the same fields"""
+        current = self.backend.get(contact['id'])
+        return current is not None and all(current[field] == contact[field] for field in FIELDS)
+
+    def sync(self):
+        """Pick up changes other processes made to the file; returns ContactChanges"""
+        changes = self.backend.sync()
+        if changes.reloaded:
+            with self.fuzzy_lock:
+                self.fuzzy_index = None
+                self.fuzzy_result = None
+        elif changes:
+            # Re-read each contact, since a local edit may be newer than the change
+            contact_ids = list(changes.changed) + list(changes.removed)
+            current = (self.backend.get(contact_id) for contact_id in contact_ids)
+            self.fuzzy_changed(added=[contact for contact in current if contact is not None],
+                               removed=contact_ids)
+        return changes
+
+    def export(self, path, fmt=None, search_term=''):
+        """Stream the matching contacts to a CSV, JSON Lines or vCard file"""
+        return contact_export.export_contacts(self, path, fmt, search_term)
@@ -0,0 +1,109 @@
+import re
+from functools import lru_cache
+
+# Compiled once at import instead of on every call
+PHONE_CHARS_RE = re.compile(r'^[\d\s\-\(\)\+\.]+$')
+NON_DIGIT_RE = re.compile(r'[^\d]')
+
+# The accepted international layouts folded into one alternation:
+#   +1-123-456-7890, +1 (123) 456-7890, 123-456-7890, (123) 456-7890, 1234567890
+PHONE_FORMAT_RE = re.compile(
+    r'^(?:'
+    r'\+\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{0,4}'
+    r'|\+\d{1,4}\s?\(\d{1,4}\)\s?\d{1,4}[\s\-]?\d{1,4}'
+    r'|\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{1,4}[\s\-]?\d{0,4}'
+    r'|\(\d{1,4}\)\s?\d{1,4}[\s\-]?\d{1,4}'
+    r'|\d{10,15}'
+    r')$'
+)
+
+EMAIL_LOCAL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+$')
+EMAIL_DOMAIN_CHARS_RE = re.compile(r'^[a-zA-Z0-9.-]+$')
+EMAIL_DOMAIN_RE = re.compile(r'^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Recent verdicts; imports and bulk edits repeat the same values a lot
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def validate_phone(phone):
+    """Validate phone number format with international support"""
+    if not phone:
+        return False, "Phone number is required"
+
+    # Clean the phone number for validation
+    phone = phone.strip()
+
+    # Valid characters: digits, spaces, hyphens, parentheses, plus sign, dots
+    if not PHONE_CHARS_RE.match(phone):
+        return False, "Phone number can only contain digits, spaces, hyphens, parentheses, plus sign, and dots"
+
+    # Check digit count; total digits should be 7-15
+    digit_count = len(NON_DIGIT_RE.sub('', phone))
+    if digit_count < 7:
+        return False, "Phone number must have at least 7 digits"
+    elif digit_count > 15:
+        return False, "Phone number cannot have more than 15 digits"
+
+    if not PHONE_FORMAT_RE.match(phone):
+        return False, "Invalid phone number format."
+
+    return True, "Valid phone number"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def validate_email(email):
+    """Validate email format with comprehensive checks"""
+    if not email:
+        return True, "Email is optional"
+
+    email = email.strip()
+
+    # Check length
+    if len(email) > 254:
+        return False, "Email address is too long (max 254 characters)"
+
+    # Check for basic format
+    if email.count('@') != 1:
+        return False, "Email must contain exactly one @ symbol"
+
+    local_part, domain_part = email.split('@')
+
+    # Validate local part (before @)
+    if not local_part or len(local_part) > 64:
+        return False, "Email local part (before @) must be 1-64 characters"
+
+    # Validate domain part (after @)
+    if not domain_part or len(domain_part) > 253:
+        return False, "Email domain part (after @) must be 1-253 characters"
+
+    if not EMAIL_LOCAL_RE.match(local_part):
+        return False, "Email local part contains invalid characters"
+
+    if not EMAIL_DOMAIN_CHARS_RE.match(domain_part):
+        return False, "Email domain contains invalid characters"
+
+    if not EMAIL_DOMAIN_RE.match(domain_part):
+        return False, "Email domain must have a valid top-level domain (e.g., .com, .org)"
+
+    if '..' in email:
+        return False, "Email cannot contain consecutive dots"
+
+    if local_part.startswith('.') or local_part.endswith('.'):
+        return False, "Email local part cannot start or end with a dot"
+
+    if not EMAIL_RE.match(email):
+        return False, "Invalid email format. Use format: example@domain.com"
+
+    return True, "Valid email"
+
+
+def validate_phones(phones):
+    """Validate many phone numbers; returns a (valid, message) pair per input"""
+    return list(map(validate_phone, phones))
+
+
+def validate_emails(emails):
+    """Validate many email addresses; returns a (valid, message) pair per input"""
+    return list(map(validate_email, emails))
@@ -5,9 +5,284 @@ import threading
 import time
 import json
 import os
+import heapq
+import itertools
+import gzip
+import bisect
+import shutil
 from tkinter import font
 
+class DataWriter:
+    """Writes snapshots of the app data to a JSON file on a background thread
+    
+    Only the newest snapshot waiting is written. Each write goes to a temp
+    file that is fsynced and renamed over the data file, so a crash never
+    leaves it half written.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.condition = threading.Condition()
+        self.pending = None
+        self.writing = False
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        
+    def submit(self, data):
+        with self.condition:
+            self.pending = data
+            self.condition.notify_all()
+            
+    def wait(self):
+        # Block until everything submitted is on disk
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+                
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+                self.writing = True
+            try:
+                self.write(data)
+            except Exception as e:
+                print(f"Error saving data: {e}")
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+                
+    def write(self, data):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+class TimerJob:
+    def __init__(self, callback, args, interval=None):
+        self.callback = callback
+        self.args = args
+        self.interval = interval  # seconds between runs of a repeating job
+        self.cancelled = False
+
+class TimerService:
+    """Timed and periodic jobs on the Tk event loop, with one pending wake-up
+    
+    Jobs wait in a heap by due time and only the soonest has a root.after
+    armed. Jobs falling due within COALESCE seconds of each other run on
+    the same wake-up. Nothing wakes at all while no job is scheduled.
+    """
+    
+    COALESCE = 1.0
+    # Longest single wait; waking now and then keeps jobs on time across
+    # clock changes and suspend
+    MAX_WAIT = 3600
+    
+    def __init__(self, root):
+        self.root = root
+        self.heap = []  # [due timestamp, sequence, job]
+        self.sequence = itertools.count()
+        self.timer = None  # root.after id of the next wake-up
+        self.timer_due = None
+        
+    def call_at(self, when, callback, *args):
+        job = TimerJob(callback, args)
+        self.push(when, job)
+        return job
+        
+    def call_every(self, interval, callback, *args):
+        # First run one interval from now; job.interval may be changed later
+        job = TimerJob(callback, args, interval)
+        self.push(time.time() + interval, job)
+        return job
+        
+    def cancel(self, job):
+        # Cancelled jobs are dropped from the heap when they reach the top
+        if job is not None and not job.cancelled:
+            job.cancelled = True
+            self.arm()
+            
+    def push(self, when, job):
+        heapq.heappush(self.heap, [when, next(self.sequence), job])
+        self.arm()
+        
+    def arm(self):
+        while self.heap and self.heap[0][2].cancelled:
+            heapq.heappop(self.heap)
+        due = self.heap[0][0] if self.heap else None
+        if self.timer is not None:
+            if due is not None and self.timer_due <= due:
+                return  # the wake-up already set comes first
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        if due is None:
+            return
+        delay = min(max(due - time.time(), 0), self.MAX_WAIT)
+        self.timer = self.root.after(int(delay * 1000), self.run_due)
+        self.timer_due = due
+        
+    def run_due(self):
+        self.timer = None
+        now = time.time()
+        due_jobs = []
+        while self.heap and self.heap[0][0] <= now + self.COALESCE:
+            due, _, job = heapq.heappop(self.heap)
+            if job.cancelled:
+                continue
+            if job.interval is not None:
+                # Next run counted from now, so a late wake-up doesn't bunch runs
+                heapq.heappush(self.heap, [max(due, now) + job.interval, next(self.sequence), job])
+            due_jobs.append(job)
+        # Re-armed first and each job run as its own event, so a job that
+        # opens a dialog holds up neither the jobs due with it nor later ones
+        self.arm()
+        for job in due_jobs:
+            self.root.after(0, self.run_job, job)
+            
+    def run_job(self, job):
+        if job.cancelled:
+            return
+        try:
+            job.callback(*job.args)
+        except Exception as e:
+            print(f"Error running timer job {getattr(job.callback, '__name__', job.callback)}: {e}")
+
+class SortedRows:
+    """Items kept in sort order, mirrored row for row in a Listbox
+    
+    Items with equal sort keys keep the order they were added in. Adding,
+    removing or changing an item touches only its own row, found by
+    bisecting the kept keys, so the Listbox is never redrawn whole.
+    """
+    
+    def __init__(self, sort_key, text):
+        self.sort_key = sort_key
+        self.text = text
+        self.items = []
+        self.keys = []  # (sort key, sequence) of each item, in order
+        self.item_keys = {}  # id(item) -> its key
+        self.sequence = itertools.count()
+        self.listbox = None
+        
+    def __len__(self):
+        return len(self.items)
+        
+    def __iter__(self):
+        return iter(self.items)
+        
+    def __getitem__(self, index):
+        return self.items[index]
+        
+    def __contains__(self, item):
+        return id(item) in self.item_keys
+        
+    def attach(self, listbox):
+        self.listbox = listbox
+        listbox.delete(0, tk.END)
+        if self.items:
+            listbox.insert(tk.END, *map(self.text, self.items))
+            
+    def index(self, item):
+        return bisect.bisect_left(self.keys, self.item_keys[id(item)])
+        
+    def add(self, item):
+        key = (self.sort_key(item), next(self.sequence))
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        self.items.insert(index, item)
+        self.item_keys[id(item)] = key
+        if self.listbox is not None:
+            self.listbox.insert(index, self.text(item))
+        return index
+        
+    def remove(self, item):
+        index = self.index(item)
+        del self.item_keys[id(item)]
+        del self.keys[index]
+        del self.items[index]
+        if self.listbox is not None:
+            self.listbox.delete(index)
+            
+    def changed(self, item):
+        # Redraw an item whose text changed but whose sort key didn't
+        index = self.index(item)
+        if self.listbox is not None:
+            selected = self.listbox.selection_includes(index)
+            self.listbox.delete(index)
+            self.listbox.insert(index, self.text(item))
+            if selected:
+                self.listbox.selection_set(index)
+
+class CompletedArchive:
+    """Completed tasks in monthly gzipped JSON Lines segments
+    
+    Segments are named completed-YYYY-MM.jsonl.gz after the month the
+    tasks were completed in, and each one is rewritten through a temp
+    file, so archiving the same task twice never duplicates it.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        
+    def path(self, month):
+        return os.path.join(self.directory, f"completed-{month}.jsonl.gz")
+        
+    def months(self):
+        # Archived months, newest first
+        if not os.path.isdir(self.directory):
+            return []
+        months = [name[len("completed-"):-len(".jsonl.gz")] for name in os.listdir(self.directory)
+                  if name.startswith("completed-") and name.endswith(".jsonl.gz")]
+        return sorted(months, reverse=True)
+        
+    def read(self, month):
+        # The month's tasks in the order they were completed
+        path = self.path(month)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+            
+    def add(self, tasks):
+        by_month = {}
+        for task in tasks:
+            by_month.setdefault(task['completed'][:7], []).append(task)
+        os.makedirs(self.directory, exist_ok=True)
+        for month, new_tasks in by_month.items():
+            archived = self.read(month)
+            seen = {json.dumps(task, sort_keys=True) for task in archived}
+            archived.extend(task for task in new_tasks if json.dumps(task, sort_keys=True) not in seen)
+            archived.sort(key=lambda task: task['completed'])
+            temp_path = self.path(month) + ".tmp"
+            with open(temp_path, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    for task in archived:
+                        f.write((json.dumps(task) + "\n").encode('utf-8'))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temp_path, self.path(month))
+            
+    def clear(self):
+        for month in self.months():
+            os.remove(self.path(month))
+
 class TodoApp:
+    DATA_FILE = 'todo_data.json'
+    PRIORITY_ORDER = {"High": 1, "Medium": 2, "Low": 3}
+    PRIORITY_SYMBOLS = {"High": "🔥", "Medium": "⚡", "Low": "📝"}
+    ARCHIVE_DIR = 'todo_archive'
+    # Completed tasks stay in DATA_FILE this long before moving to the archive
+    ARCHIVE_AFTER_DAYS = 30
+    # Milliseconds between the first change and writing it; later changes
+    # in that window go out in the same write
+    SAVE_DELAY = 500
+    # Default minutes between water reminders; stored in DATA_FILE
+    WATER_REMINDER_MINUTES = 5
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Advanced To-Do List Manager")
@@ -15,19 +290,40 @@ class TodoApp:
         self.root.configure(bg='#f0f0f0')
         
         # Data storage
-        self.tasks = []
-        self.completed_tasks = []
+        # Active tasks by priority and scheduled ones by time, each kept in
+        # listbox order so a change only touches its own row
+        self.tasks = SortedRows(lambda task: self.PRIORITY_ORDER[task['priority']],
+                                self.task_text)
+        self.completed_tasks = []  # recent ones; older ones are archived
+        self.archive = CompletedArchive(self.ARCHIVE_DIR)
+        self.archive_months = []  # archived months not shown yet, newest first
+        self.archived_tasks = []  # archived tasks shown so far, newest first
+        self.archive_load_pending = False
         self.streak_count = 0
         self.last_completed_date = None
         self.water_reminder_active = True
-        self.scheduled_tasks = []
+        self.water_reminder_minutes = self.WATER_REMINDER_MINUTES
+        self.scheduled_tasks = SortedRows(lambda task: task['datetime'], self.scheduled_text)
+        
+        # Alarms, the water reminder and other timed jobs share one timer
+        self.timers = TimerService(self.root)
+        self.alarm_jobs = {}  # id(task) -> its alarm's TimerJob
+        self.water_job = None
+        
+        # Saves are batched and written on the writer's thread
+        self.save_timer = None
+        self.data_writer = DataWriter(self.DATA_FILE)
         
         # Load data
+        self.load_problems = []  # what load_data had to leave out or change
+        self.load_backup = None
         self.load_data()
+        self.archive_old_completed()
+        self.archive_months = self.archive.months()
         
-        # Start background threads
+        # Start timed jobs
         self.start_water_reminder()
-        self.start_scheduler_check()
+        self.start_scheduler()
         
         # Create GUI
         self.create_widgets()
@@ -35,6 +331,9 @@ class TodoApp:
         # Start streak check
         self.update_streak_display()
         
+        if self.load_problems:
+            self.show_load_problems()
+        
     def create_widgets(self):
         # Main frame
         main_frame = tk.Frame(self.root, bg='#f0f0f0')
@@ -109,7 +408,7 @@ class TodoApp:
         
         self.priority_var = tk.StringVar(value="Medium")
         priority_combo = ttk.Combobox(add_frame, textvariable=self.priority_var, 
-                                     values=["High", "Medium", "Low"], width=10)
+                                     values=list(self.PRIORITY_ORDER), width=10, state="readonly")
         priority_combo.pack(side=tk.LEFT)
         
         # Tasks list frame
@@ -145,7 +444,7 @@ class TodoApp:
                             font=("Arial", 10, "bold"))
         edit_btn.pack(side=tk.LEFT)
         
-        self.refresh_tasks_list()
+        self.tasks.attach(self.tasks_listbox)
         
     def create_scheduler_tab(self):
         # Schedule task frame
@@ -202,7 +501,7 @@ class TodoApp:
                                         bg='#f44336', fg='white', font=("Arial", 10, "bold"))
         remove_scheduled_btn.pack(pady=10)
         
-        self.refresh_scheduled_list()
+        self.scheduled_tasks.attach(self.scheduled_listbox)
         
     def create_completed_tab(self):
         # Completed tasks list
@@ -212,8 +511,18 @@ class TodoApp:
         tk.Label(completed_frame, text="Completed Tasks:", font=("Arial", 12, "bold"), 
                 bg='#ffffff').pack(anchor=tk.W, pady=(0, 10))
         
-        self.completed_listbox = tk.Listbox(completed_frame, font=("Arial", 10), height=15)
-        self.completed_listbox.pack(fill=tk.BOTH, expand=True)
+        list_frame = tk.Frame(completed_frame, bg='#ffffff')
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.completed_listbox = tk.Listbox(list_frame, font=("Arial", 10), height=15)
+        
+        # Older months are read from the archive as the list scrolls to the end
+        self.completed_scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL,
+                                                command=self.completed_listbox.yview)
+        self.completed_listbox.configure(yscrollcommand=self.on_completed_scroll)
+        
+        self.completed_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.completed_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Clear completed button
         clear_btn = tk.Button(completed_frame, text="Clear Completed", 
@@ -227,49 +536,53 @@ class TodoApp:
         task_text = self.task_entry.get().strip()
         if task_text:
             priority = self.priority_var.get()
+            if priority not in self.PRIORITY_ORDER:
+                messagebox.showerror("Error", "Priority must be High, Medium or Low!")
+                return
             task = {
                 'text': task_text,
                 'priority': priority,
                 'created': datetime.now().strftime("%Y-%m-%d %H:%M")
             }
-            self.tasks.append(task)
+            self.tasks.add(task)
             self.task_entry.delete(0, tk.END)
-            self.refresh_tasks_list()
             self.save_data()
             self.update_tasks_count()
             
-    def complete_task(self):
+    def selected_task(self):
         selection = self.tasks_listbox.curselection()
-        if selection:
-            task = self.tasks.pop(selection[0])
+        return self.tasks[selection[0]] if selection else None
+        
+    def complete_task(self):
+        task = self.selected_task()
+        if task is not None:
+            self.tasks.remove(task)
             task['completed'] = datetime.now().strftime("%Y-%m-%d %H:%M")
             self.completed_tasks.append(task)
-            self.refresh_tasks_list()
-            self.refresh_completed_list()
+            self.completed_listbox.insert(0, self.completed_text(task))  # most recent first
             self.save_data()
             self.update_streak()
             self.update_tasks_count()
             messagebox.showinfo("Task Completed", f"Great job! Task completed: {task['text']}")
             
     def delete_task(self):
-        selection = self.tasks_listbox.curselection()
-        if selection:
-            task = self.tasks[selection[0]]
-            if messagebox.askyesno("Delete Task", f"Are you sure you want to delete: {task['text']}?"):
-                self.tasks.pop(selection[0])
-                self.refresh_tasks_list()
+        task = self.selected_task()
+        if task is not None:
+            # The dialog runs the event loop, so check the task is still there
+            if (messagebox.askyesno("Delete Task", f"Are you sure you want to delete: {task['text']}?")
+                    and task in self.tasks):
+                self.tasks.remove(task)
                 self.save_data()
                 self.update_tasks_count()
                 
     def edit_task(self):
-        selection = self.tasks_listbox.curselection()
-        if selection:
-            task = self.tasks[selection[0]]
+        task = self.selected_task()
+        if task is not None:
             new_text = tk.simpledialog.askstring("Edit Task", "Enter new task text:", 
                                                 initialvalue=task['text'])
-            if new_text:
+            if new_text and task in self.tasks:
                 task['text'] = new_text.strip()
-                self.refresh_tasks_list()
+                self.tasks.changed(task)
                 self.save_data()
                 
     def schedule_task(self):
@@ -289,9 +602,9 @@ class TodoApp:
                     'datetime': scheduled_datetime,
                     'created': datetime.now().strftime("%Y-%m-%d %H:%M")
                 }
-                self.scheduled_tasks.append(scheduled_task)
+                self.scheduled_tasks.add(scheduled_task)
+                self.add_alarm(scheduled_task)
                 self.schedule_task_entry.delete(0, tk.END)
-                self.refresh_scheduled_list()
                 self.save_data()
                 messagebox.showinfo("Task Scheduled", f"Task scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M')}")
                 
@@ -302,39 +615,78 @@ class TodoApp:
         selection = self.scheduled_listbox.curselection() 
         if selection:
             task = self.scheduled_tasks[selection[0]]
-            if messagebox.askyesno("Remove Scheduled Task", f"Remove scheduled task: {task['text']}?"):
-                self.scheduled_tasks.pop(selection[0])
-                self.refresh_scheduled_list()
+            # Skip it if its alarm went off while the dialog was open
+            if (messagebox.askyesno("Remove Scheduled Task", f"Remove scheduled task: {task['text']}?")
+                    and task in self.scheduled_tasks):
+                self.scheduled_tasks.remove(task)
+                self.remove_alarm(task)
                 self.save_data()
                 
     def clear_completed(self):
         if messagebox.askyesno("Clear Completed", "Are you sure you want to clear all completed tasks?"):
             self.completed_tasks.clear()
+            self.archived_tasks.clear()
+            self.archive_months = []
+            try:
+                self.archive.clear()
+            except Exception as e:
+                print(f"Error clearing archive: {e}")
             self.refresh_completed_list()
             self.save_data()
             
-    def refresh_tasks_list(self):
-        self.tasks_listbox.delete(0, tk.END)
-        # Sort by priority
-        priority_order = {"High": 1, "Medium": 2, "Low": 3}
-        sorted_tasks = sorted(self.tasks, key=lambda x: priority_order[x['priority']])
-        
-        for task in sorted_tasks:
-            priority_symbol = {"High": "🔥", "Medium": "⚡", "Low": "📝"}
-            display_text = f"{priority_symbol[task['priority']]} {task['text']} ({task['created']})"
-            self.tasks_listbox.insert(tk.END, display_text)
-            
-    def refresh_scheduled_list(self):
-        self.scheduled_listbox.delete(0, tk.END)
-        for task in sorted(self.scheduled_tasks, key=lambda x: x['datetime']):
-            display_text = f"⏰ {task['text']} - {task['datetime'].strftime('%Y-%m-%d %H:%M')}"
-            self.scheduled_listbox.insert(tk.END, display_text)
-            
+    def task_text(self, task):
+        return f"{self.PRIORITY_SYMBOLS[task['priority']]} {task['text']} ({task['created']})"
+        
+    def scheduled_text(self, task):
+        return f"⏰ {task['text']} - {task['datetime'].strftime('%Y-%m-%d %H:%M')}"
+        
     def refresh_completed_list(self):
         self.completed_listbox.delete(0, tk.END)
-        for task in reversed(self.completed_tasks):  # Show most recent first
-            display_text = f"✅ {task['text']} - Completed: {task['completed']}"
-            self.completed_listbox.insert(tk.END, display_text)
+        # Show most recent first
+        texts = [self.completed_text(task) for task in reversed(self.completed_tasks)]
+        texts.extend(self.completed_text(task) for task in self.archived_tasks)
+        if texts:
+            self.completed_listbox.insert(tk.END, *texts)
+            
+    def completed_text(self, task):
+        return f"✅ {task['text']} - Completed: {task['completed']}"
+        
+    def on_completed_scroll(self, first, last):
+        self.completed_scrollbar.set(first, last)
+        # Near the end (or not yet full), page in the next archived month
+        if float(last) >= 0.95 and self.archive_months and not self.archive_load_pending:
+            self.archive_load_pending = True
+            self.root.after_idle(self.load_archived_month)
+            
+    def load_archived_month(self):
+        self.archive_load_pending = False
+        if not self.archive_months:
+            return
+        month = self.archive_months.pop(0)
+        try:
+            tasks = self.archive.read(month)
+        except Exception as e:
+            print(f"Error reading archive {month}: {e}")
+            return
+        tasks.reverse()
+        self.archived_tasks.extend(tasks)
+        if tasks:
+            self.completed_listbox.insert(tk.END, *map(self.completed_text, tasks))
+            
+    def archive_old_completed(self):
+        # Move tasks completed before the active window into the archive
+        cutoff = (datetime.now() - timedelta(days=self.ARCHIVE_AFTER_DAYS)).strftime("%Y-%m-%d %H:%M")
+        old = [task for task in self.completed_tasks if task['completed'] < cutoff]
+        if not old:
+            return
+        try:
+            self.archive.add(old)
+        except Exception as e:
+            print(f"Error archiving completed tasks: {e}")
+            return
+        self.completed_tasks = [task for task in self.completed_tasks
+                                if task['completed'] >= cutoff]
+        self.save_data()
             
     def update_streak(self):
         today = datetime.now().date()
@@ -361,39 +713,37 @@ class TodoApp:
         
     def toggle_water_reminder(self):
         self.water_reminder_active = self.water_var.get()
+        self.start_water_reminder()
         self.save_data()
         
     def start_water_reminder(self):
-        def water_reminder():
-            while True:
-                time.sleep(300)  # 30 minutes = 1800 seconds
-                if self.water_reminder_active:
-                    self.show_water_reminder()
-                    
-        thread = threading.Thread(target=water_reminder, daemon=True)
-        thread.start()
+        # (Re)start the reminder at the current interval; off means no wake-ups
+        self.timers.cancel(self.water_job)
+        self.water_job = None
+        if self.water_reminder_active:
+            self.water_job = self.timers.call_every(self.water_reminder_minutes * 60,
+                                                    self.show_water_reminder)
         
     def show_water_reminder(self):
-        def show_popup():
+        if self.water_reminder_active:
             messagebox.showinfo("Water Reminder", "💧 Time to drink water! Stay hydrated! 💧")
+            
+    def start_scheduler(self):
+        for task in self.scheduled_tasks:
+            self.add_alarm(task)
         
-        self.root.after(0, show_popup)
+    def add_alarm(self, task):
+        self.alarm_jobs[id(task)] = self.timers.call_at(task['datetime'].timestamp(),
+                                                        self.fire_alarm, task)
         
-    def start_scheduler_check(self):
-        def check_scheduled_tasks():
-            while True:
-                time.sleep(60)  # Check every minute
-                current_time = datetime.now()
-                
-                for task in self.scheduled_tasks[:]:  # Create a copy to iterate
-                    if current_time >= task['datetime']:
-                        self.show_scheduled_task_alarm(task)
-                        self.scheduled_tasks.remove(task)
-                        self.root.after(0, self.refresh_scheduled_list)
-                        self.root.after(0, self.save_data)
-                        
-        thread = threading.Thread(target=check_scheduled_tasks, daemon=True)
-        thread.start()
+    def remove_alarm(self, task):
+        self.timers.cancel(self.alarm_jobs.pop(id(task), None))
+        
+    def fire_alarm(self, task):
+        del self.alarm_jobs[id(task)]
+        self.scheduled_tasks.remove(task)
+        self.show_scheduled_task_alarm(task)
+        self.save_data()
         
     def show_scheduled_task_alarm(self, task):
         def show_alarm():
@@ -405,20 +755,29 @@ class TodoApp:
                     'priority': 'High',
                     'created': datetime.now().strftime("%Y-%m-%d %H:%M")
                 }
-                self.tasks.append(new_task)
-                self.root.after(0, self.refresh_tasks_list)
-                self.root.after(0, self.update_tasks_count)
-                self.root.after(0, self.save_data)
+                self.tasks.add(new_task)
+                self.update_tasks_count()
+                self.save_data()
                 
         self.root.after(0, show_alarm)
         
     def save_data(self):
+        if self.save_timer is None:
+            self.save_timer = self.root.after(self.SAVE_DELAY, self.flush_data)
+            
+    def flush_data(self):
+        self.save_timer = None
+        self.data_writer.submit(self.snapshot_data())
+        
+    def snapshot_data(self):
+        # Copies of every task, so later edits can't change what gets written
         data = {
-            'tasks': self.tasks,
-            'completed_tasks': self.completed_tasks,
+            'tasks': [task.copy() for task in self.tasks],
+            'completed_tasks': [task.copy() for task in self.completed_tasks],
             'streak_count': self.streak_count,
             'last_completed_date': self.last_completed_date,
             'water_reminder_active': self.water_reminder_active,
+            'water_reminder_minutes': self.water_reminder_minutes,
             'scheduled_tasks': []
         }
         
@@ -427,37 +786,133 @@ class TodoApp:
             task_copy = task.copy()
             task_copy['datetime'] = task['datetime'].strftime("%Y-%m-%d %H:%M:%S")
             data['scheduled_tasks'].append(task_copy)
+        return data
             
+    def load_data(self):
+        # Everything is parsed and checked before any state is touched, so a
+        # bad file can't leave half-loaded tasks for the next save to write
+        if not os.path.exists(self.DATA_FILE):
+            return
         try:
-            with open('todo_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(self.DATA_FILE, 'r') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
         except Exception as e:
-            print(f"Error saving data: {e}")
+            self.load_problems.append(f"The file could not be read: {e}")
+            self.back_up_data_file()
+            return
             
-    def load_data(self):
+        problems = self.load_problems
+        tasks = self.valid_rows(data.get('tasks'), self.parse_task, problems)
+        completed_tasks = self.valid_rows(data.get('completed_tasks'),
+                                          self.parse_completed_task, problems)
+        scheduled_tasks = self.valid_rows(data.get('scheduled_tasks'),
+                                          self.parse_scheduled_task, problems)
+        if problems:
+            # The next save rewrites the file without what was left out
+            self.back_up_data_file()
+        
+        streak_count = data.get('streak_count', 0)
+        if not isinstance(streak_count, int) or isinstance(streak_count, bool) or streak_count < 0:
+            streak_count = 0
+        last_completed_date = data.get('last_completed_date')
         try:
-            if os.path.exists('todo_data.json'):
-                with open('todo_data.json', 'r') as f:
-                    data = json.load(f)
-                    
-                self.tasks = data.get('tasks', [])
-                self.completed_tasks = data.get('completed_tasks', [])
-                self.streak_count = data.get('streak_count', 0)
-                self.last_completed_date = data.get('last_completed_date', None)
-                self.water_reminder_active = data.get('water_reminder_active', True)
-                
-                # Convert scheduled tasks strings back to datetime objects
-                scheduled_data = data.get('scheduled_tasks', [])
-                for task_data in scheduled_data:
-                    task = task_data.copy()
-                    task['datetime'] = datetime.strptime(task_data['datetime'], "%Y-%m-%d %H:%M:%S")
-                    self.scheduled_tasks.append(task)
-                    
-        except Exception as e:
-            print(f"Error loading data: {e}")
+            datetime.strptime(last_completed_date, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            last_completed_date = None
+        water_reminder_active = data.get('water_reminder_active', True)
+        if not isinstance(water_reminder_active, bool):
+            water_reminder_active = True
+        water_reminder_minutes = data.get('water_reminder_minutes', self.WATER_REMINDER_MINUTES)
+        if (not isinstance(water_reminder_minutes, (int, float)) or isinstance(water_reminder_minutes, bool)
+                or water_reminder_minutes <= 0):
+            water_reminder_minutes = self.WATER_REMINDER_MINUTES
+            
+        self.completed_tasks = completed_tasks
+        self.streak_count = streak_count
+        self.last_completed_date = last_completed_date
+        self.water_reminder_active = water_reminder_active
+        self.water_reminder_minutes = water_reminder_minutes
+        for task in tasks:
+            self.tasks.add(task)
+        for task in scheduled_tasks:
+            self.scheduled_tasks.add(task)
+            
+    @staticmethod
+    def valid_rows(rows, parse, problems):
+        # The rows parse accepts, in order; the others are added to problems
+        if rows is None:
+            return []
+        if not isinstance(rows, list):
+            problems.append(f"Expected a list of tasks, found {rows!r}")
+            return []
+        valid = []
+        for row in rows:
+            try:
+                valid.append(parse(row, problems))
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                problems.append(f"Skipped {row!r}: {e}")
+        return valid
+        
+    def parse_task(self, row, problems):
+        task = dict(row)
+        if not isinstance(task['text'], str) or not task['text'].strip():
+            raise ValueError("no text")
+        if task.get('priority') not in self.PRIORITY_ORDER:
+            problems.append(f"Task {task['text']!r} had priority {task.get('priority')!r}, "
+                            f"now Medium")
+            task['priority'] = "Medium"
+        if not isinstance(task.get('created'), str):
+            task['created'] = ""
+        return task
+        
+    @staticmethod
+    def parse_completed_task(row, problems):
+        task = dict(row)
+        if not isinstance(task['text'], str):
+            raise ValueError("no text")
+        # Archiving compares and buckets these strings, so they must be well formed
+        datetime.strptime(task['completed'], "%Y-%m-%d %H:%M")
+        return task
+        
+    @staticmethod
+    def parse_scheduled_task(row, problems):
+        task = dict(row)
+        if not isinstance(task['text'], str) or not task['text'].strip():
+            raise ValueError("no text")
+        task['datetime'] = datetime.strptime(task['datetime'], "%Y-%m-%d %H:%M:%S")
+        return task
+        
+    def back_up_data_file(self):
+        # Keep the file as it was before a save can rewrite it
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        backup = f"{os.path.splitext(self.DATA_FILE)[0]}-backup-{stamp}.json"
+        try:
+            shutil.copy2(self.DATA_FILE, backup)
+            self.load_backup = backup
+        except OSError as e:
+            print(f"Error backing up data: {e}")
             
+    def show_load_problems(self):
+        for problem in self.load_problems:
+            print(f"Error loading data: {problem}")
+        shown = "\n".join(self.load_problems[:5])
+        if len(self.load_problems) > 5:
+            shown += f"\n... and {len(self.load_problems) - 5} more"
+        if self.load_backup:
+            kept = f"The original file was kept as {os.path.abspath(self.load_backup)}."
+        else:
+            kept = "The original file could not be backed up and will be overwritten by the next save."
+        messagebox.showwarning("Data Problems",
+                               f"Some of {self.DATA_FILE} could not be loaded as it was:\n\n"
+                               f"{shown}\n\n{kept}")
+        
     def on_closing(self):
-        self.save_data()
+        if self.save_timer is not None:
+            self.root.after_cancel(self.save_timer)
+        self.flush_data()
+        self.data_writer.wait()
         self.root.destroy()
 
 def main():
@@ -0,0 +1,91 @@
+import heapq
+import itertools
+import unittest
+from unittest import mock
+
+import To_Do_List_App
+from To_Do_List_App import TimerService
+
+
+class FakeRoot:
+    """root.after and after_cancel on a simulated clock
+
+    run_until may be called from inside a callback, like the event loop a
+    modal dialog runs while it is open.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.events = []  # [due, sequence, after id, callback, args]
+        self.cancelled = set()
+        self.sequence = itertools.count()
+
+    def after(self, ms, callback, *args):
+        after_id = f"after#{next(self.sequence)}"
+        heapq.heappush(self.events, [self.now + ms / 1000, next(self.sequence),
+                                     after_id, callback, args])
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.cancelled.add(after_id)
+
+    def run_until(self, when):
+        while self.events and self.events[0][0] <= when:
+            due, _, after_id, callback, args = heapq.heappop(self.events)
+            if after_id in self.cancelled:
+                continue
+            self.now = max(self.now, due)
+            callback(*args)
+        self.now = max(self.now, when)
+
+
+class TimerServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = FakeRoot()
+        patcher = mock.patch.object(To_Do_List_App.time, 'time', lambda: self.root.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.timers = TimerService(self.root)
+        self.fired = []
+
+    def blocking_dialog(self, name, seconds):
+        # Records when it opened, then keeps the event loop busy like a messagebox
+        self.fired.append((name, self.root.now))
+        self.root.run_until(self.root.now + seconds)
+
+    def record(self, name):
+        self.fired.append((name, self.root.now))
+
+    def test_blocking_job_does_not_delay_later_jobs(self):
+        start = self.root.now
+        self.timers.call_at(start + 60, self.blocking_dialog, 'water', 600)
+        self.timers.call_at(start + 120, self.record, 'alarm')
+        self.root.run_until(start + 1000)
+        self.assertEqual(self.fired, [('water', start + 60), ('alarm', start + 120)])
+
+    def test_blocking_job_does_not_delay_jobs_due_with_it(self):
+        start = self.root.now
+        self.timers.call_at(start + 60, self.blocking_dialog, 'water', 600)
+        self.timers.call_at(start + 60.5, self.record, 'alarm')
+        self.root.run_until(start + 1000)
+        self.assertEqual([name for name, _ in self.fired], ['water', 'alarm'])
+        self.assertLess(self.fired[1][1], start + 62)
+
+    def test_repeating_job_keeps_its_interval_while_another_blocks(self):
+        start = self.root.now
+        self.timers.call_every(60, self.record, 'tick')
+        self.timers.call_at(start + 30, self.blocking_dialog, 'alarm', 300)
+        self.root.run_until(start + 300)
+        ticks = [when - start for name, when in self.fired if name == 'tick']
+        self.assertEqual(ticks, [60, 120, 180, 240, 300])
+
+    def test_cancelled_job_does_not_run(self):
+        job = self.timers.call_at(self.root.now + 10, self.record, 'alarm')
+        self.timers.cancel(job)
+        self.root.run_until(self.root.now + 100)
+        self.assertEqual(self.fired, [])
+
+
+if __name__ == '__main__':
+    unittest.main()